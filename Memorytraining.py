@@ -7,64 +7,188 @@ import json
 import html as html_lib
 import streamlit.components.v1 as components
 import plotly.graph_objects as go
-from datetime import datetime
+from datetime import datetime, time as datetime_time, timedelta
 from supabase import create_client, Client
 import pathlib
+import hashlib
+import threading
+import time
+import heapq
+import struct
+from string import Template
+from array import array
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+	import fcntl
+except ImportError:  # Windows
+	fcntl = None
+	import msvcrt
+
+try:
+	import msgpack
+except ImportError:  # optional: ohne msgpack werden Snapshots als JSON gespeichert
+	msgpack = None
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import subprocess
+import openpyxl
+import Memorytraining_codec as codec
 
 # Pfad zur festen Excel-Datei (ändere hier bei Bedarf)
 # Aktuell nutzt die Datei im gleichen Ordner wie dieses Skript: 'sample_memory.xlsx'
 DEFAULT_XLSX_PATH = os.path.join(os.getcwd(), "sample_memory.xlsx")
 
+# Ordner mit weiteren Decks (.xlsx) für die Deck-Bibliothek
+DECK_LIBRARY_DIR = os.path.dirname(DEFAULT_XLSX_PATH)
+
+# Speicherbudget für geparste Decks im LRU-Cache (Bytes)
+DECK_CACHE_BUDGET = 256 * 1024 * 1024
+
+# Prüfintervall (Sekunden) des Datei-Watchers, falls watchdog/inotify fehlt
+DECK_WATCH_INTERVAL = 2.0
+
+# Wartezeit nach einem Dateiereignis, bis die Datei fertig geschrieben ist
+DECK_WATCH_DEBOUNCE = 0.5
+
 # Pfad zur Fehlerstatistik-Datei
 STATS_FILE = os.path.join(os.getcwd(), "memory_stats.json")
 
+# Längste Wartezeit (Sekunden) auf eine Dateisperre unter Windows
+FILE_LOCK_TIMEOUT = 60.0
+
+# Anzahl der häufigsten Fehler in der Seitenleiste
+STATS_TOP_K = 25
+
+# Ordner für gespeicherte Ergebnisberichte
+REPORTS_DIR = os.path.join(os.getcwd(), "reports")
+
+# Zeilen pro Seite im Ergebnisbericht; längere Runden werden als Datei gespeichert
+RESULT_PAGE_SIZE = 200
+
+# Vorlagen für den Ergebnisbericht (einmal beim Import kompiliert)
+RESULT_PAGE_TEMPLATE = Template(
+	"<html><head><meta charset='utf-8'><title>Ergebnis</title>"
+	"<style>body{font-family:Arial,Helvetica,sans-serif;padding:16px}"
+	"table th,table td{padding:8px;text-align:left}</style></head>"
+	"<body><h1>Ergebnis</h1>$body</body></html>"
+)
+RESULT_TABLE_HEAD = (
+	"<table border='1' style='border-collapse:collapse; width:100%'>"
+	"<thead><tr><th>Prompt</th><th>Lösung</th><th>Deine Antwort</th></tr></thead><tbody>"
+)
+RESULT_ROW_TEMPLATE = Template("<tr><td>$prompt</td><td>$solution</td><td>$answer</td></tr>")
+
+# Antwort-Ereignisse als Parquet-Teildateien je Kalenderwoche (woche=JJJJ-Www/*.parquet)
+EVENTS_DIR = os.path.join(os.getcwd(), "answer_events")
+
+# gepufferte Ereignisse werden am Rundenende geschrieben, spätestens aber ab so vielen Zeilen
+EVENT_FLUSH_ROWS = 5000
+
+# ab so vielen Teildateien einer Woche werden sie zu einer zusammengeführt
+EVENT_COMPACT_FILES = 32
+
+# Anzahl Wochen/Karten im Diagramm "Trefferquote je Karte und Woche"
+ACCURACY_CHART_WEEKS = 12
+ACCURACY_CHART_CARDS = 20
+
+# Ordner für Quiz-Snapshots (Fortsetzen nach Verbindungsabbruch)
+SESSION_DIR = os.path.join(os.getcwd(), "sessions")
+
+# Snapshots werden höchstens so oft (Sekunden) geschrieben
+SESSION_SAVE_INTERVAL = 2.0
+
+# Antwortzeiten je Karte (Anzahl, Mittelwert, M2 nach Welford) als Binärdatei
+TIMING_FILE = os.path.join(os.getcwd(), "memory_timing.bin")
+
+# Antworten, die länger dauern (Sekunden), gelten als Unterbrechung und zählen nicht
+RESPONSE_TIME_MAX = 120.0
+
+# Karten, deren mittlere Antwortzeit um diesen Faktor über dem Schnitt liegt, gelten als langsam
+SLOW_FACTOR = 1.5
+
+# Optionale Deck-Spalten, die zusätzlich zu Bezeichnung/Bedeutung übernommen werden
+OPTIONAL_COLUMNS = ["Audio", "Start", "Ende"]
+
+# Cache für aufbereitete Audio-Clips (Dateiname = Inhalts-Hash)
+AUDIO_CACHE_DIR = os.path.join(os.getcwd(), "audio_cache")
+
+# Aufbereitung: Stille am Anfang/Ende entfernen, Lautheit normalisieren (ffmpeg -af)
+AUDIO_FILTER = (
+	"silenceremove=start_periods=1:start_threshold=-50dB,areverse,"
+	"silenceremove=start_periods=1:start_threshold=-50dB,areverse,"
+	"loudnorm=I=-16:TP=-1.5:LRA=11"
+)
+
+# Ausschnitte (Start/Ende) auch mit AUDIO_FILTER aufbereiten; Standard ist
+# der schnellere Stream-Copy ohne Neukodierung (Opt-in, siehe auch
+# Memorytraining_audio_segmente.py --normalisieren)
+SEGMENT_NORMALIZE = False
+
+# Speicherbudget für Clip-Inhalte im LRU-Cache (Bytes)
+AUDIO_CLIPS_BUDGET = 128 * 1024 * 1024
+
+# MIME-Typen für st.audio
+AUDIO_MIME_TYPES = {".m4a": "audio/mp4", ".mp3": "audio/mpeg", ".ogg": "audio/ogg", ".opus": "audio/ogg", ".webm": "audio/webm", ".wav": "audio/wav", ".flac": "audio/flac"}
+
+# Pfad zur Ablage der Statistik entfernter Karten (Tombstones)
+TOMBSTONE_FILE = os.path.join(os.getcwd(), "memory_tombstones.json")
+
 # Pfad zur Fortschrittsdatei
 PROGRESS_FILE = os.path.join(os.getcwd(), "memory_progress.json")
 
-# Supabase Verbindung
-@st.cache_resource
-def get_supabase_client() -> Client:
-	import pathlib
-	
-	# Versuche zuerst st.secrets zu lesen
-	url = st.secrets.get("SUPABASE_URL")
-	key = st.secrets.get("SUPABASE_KEY")
-	
-	# Falls das nicht funktioniert, lies direkt aus secrets.toml
-	if not url or len(key or "") < 100:
-		print("⚠️ st.secrets funktioniert nicht, lese direkt aus secrets.toml...")
-		try:
-			secrets_path = pathlib.Path(__file__).parent / ".streamlit" / "secrets.toml"
-			if secrets_path.exists():
-				print(f"📁 Lese von: {secrets_path}")
-				with open(secrets_path, "r", encoding="utf-8") as f:
-					content = f.read()
-					print(f"📄 Dateiinhalt:\n{content[:500]}")
-					# Parse manuell
-					for line in content.split("\n"):
-						line = line.strip()
-						if line.startswith("SUPABASE_URL"):
-							url = line.split("=", 1)[1].strip().strip('"')
-						elif line.startswith("SUPABASE_KEY"):
-							key = line.split("=", 1)[1].strip().strip('"')
-					print(f"✅ Manuell geparst: URL={url}, KEY länge={len(key)}")
-		except Exception as e:
-			print(f"❌ Fehler beim Lesen der secrets.toml: {e}")
-	
+def read_supabase_credentials(url=None, key=None):
+	"""Ergänzt fehlende Zugangsdaten aus der Umgebung bzw. direkt aus .streamlit/secrets.toml (ohne Streamlit)."""
+	url = url or os.environ.get("SUPABASE_URL")
+	key = key or os.environ.get("SUPABASE_KEY")
+	if url and len(key or "") >= 100:
+		return url, key
+	print("⚠️ st.secrets funktioniert nicht, lese direkt aus secrets.toml...")
+	try:
+		secrets_path = pathlib.Path(__file__).parent / ".streamlit" / "secrets.toml"
+		if secrets_path.exists():
+			print(f"📁 Lese von: {secrets_path}")
+			with open(secrets_path, "r", encoding="utf-8") as f:
+				content = f.read()
+				# Parse manuell
+				for line in content.split("\n"):
+					line = line.strip()
+					if line.startswith("SUPABASE_URL"):
+						url = line.split("=", 1)[1].strip().strip('"')
+					elif line.startswith("SUPABASE_KEY"):
+						key = line.split("=", 1)[1].strip().strip('"')
+				print(f"✅ Manuell geparst: URL={url}, KEY länge={len(key or '')}")
+	except Exception as e:
+		print(f"❌ Fehler beim Lesen der secrets.toml: {e}")
+	return url, key
+
+
+def connect_supabase(url, key) -> Client:
+	"""Erstellt einen Supabase-Client; wirft RuntimeError bei fehlenden oder ungültigen Zugangsdaten."""
 	print(f"🔍 DEBUG: URL={url}")
 	print(f"🔍 DEBUG: KEY länge={len(key) if key else 0}")
-	
 	if not url or not key:
-		st.error("❌ Supabase-Credentials nicht gefunden! Bitte .streamlit/secrets.toml prüfen.")
-		st.stop()
+		raise RuntimeError("Supabase-Credentials nicht gefunden! Bitte .streamlit/secrets.toml prüfen.")
 	if not url.startswith("https://"):
-		st.error("❌ URL muss mit 'https://' beginnen")
-		st.stop()
+		raise RuntimeError("URL muss mit 'https://' beginnen")
+	print("🔗 Versuche mit Supabase zu verbinden...")
+	client = create_client(url, key)
+	print("✅ Supabase Client erstellt!")
+	return client
+
+
+# Supabase Verbindung
+@st.cache_resource
+def get_supabase_client() -> Client:
+	# Versuche zuerst st.secrets zu lesen, sonst Umgebung/secrets.toml
+	url, key = read_supabase_credentials(st.secrets.get("SUPABASE_URL"), st.secrets.get("SUPABASE_KEY"))
 	try:
-		print("🔗 Versuche mit Supabase zu verbinden...")
-		client = create_client(url, key)
-		print("✅ Supabase Client erstellt!")
-		return client
+		return connect_supabase(url, key)
+	except RuntimeError as e:
+		st.error(f"❌ {e}")
+		st.stop()
 	except Exception as e:
 		print(f"❌ Fehler beim create_client: {type(e).__name__}: {e}")
 		st.error(f"❌ Fehler beim Verbinden zu Supabase: {e}")
@@ -80,29 +204,126 @@ def normalize(s: str) -> str:
 	return s
 
 
+def normalize_series(values: pd.Series) -> pd.Series:
+	"""Wie normalize(), aber vektorisiert für eine ganze Spalte."""
+	return (
+		values.fillna("").astype(str)
+		.str.strip().str.lower()
+		.str.replace(r"\s+", " ", regex=True)
+		.str.replace(r"[^0-9a-zäöüß ]", "", regex=True)
+	)
+
+
+def identity_series(values: pd.Series) -> pd.Series:
+	"""Identitätsschlüssel einer Spalte für Karten-IDs und Duplikate.
+
+	Anders als normalize_series() (nur zum Bewerten von Antworten) gehen
+	keine Zeichen verloren: NFKC, casefold und Leerraum zusammengefasst,
+	"IL-6" und "IL6" bleiben also verschiedene Karten.
+	"""
+	return (
+		values.fillna("").astype(str)
+		.str.normalize("NFKC").str.casefold()
+		.str.replace(r"\s+", " ", regex=True)
+		.str.strip()
+	)
+
+
+@contextmanager
+def file_lock(path):
+	"""Exklusive Sperre für path über <path>.lock, auch zwischen Prozessen.
+
+	Nicht verschachteln: eine zweite Sperre auf dieselbe Datei wartet auch im selben Prozess.
+	Unter Windows wird höchstens FILE_LOCK_TIMEOUT Sekunden gewartet (TimeoutError).
+	"""
+	with open(f"{path}.lock", 'a+b') as f:
+		if fcntl is not None:
+			fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+		else:
+			f.seek(0)
+			deadline = time.monotonic() + FILE_LOCK_TIMEOUT
+			while True:
+				try:
+					msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+					break
+				except OSError:
+					# LK_LOCK gibt nach ca. 10 Sekunden auf -> bis zur Frist weiter warten
+					if time.monotonic() >= deadline:
+						raise TimeoutError(f"Sperre {path}.lock nach {FILE_LOCK_TIMEOUT:.0f} s nicht erhalten (hängt ein anderer Prozess?)")
+		try:
+			yield
+		finally:
+			if fcntl is not None:
+				fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+			else:
+				f.seek(0)
+				msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def load_json_state(path, schema=None):
+	"""Lädt eine lokale JSON-Zustandsdatei; fehlt sie, kommt {} zurück.
+
+	Ist sie unlesbar oder passt nicht zum Schema, wird sie als
+	<path>.defekt-<Zeit> beiseitegelegt, statt beim nächsten Speichern
+	stillschweigend überschrieben zu werden.
+	"""
+	try:
+		with open(path, 'rb') as f:
+			return codec.decode(f.read(), schema)
+	except FileNotFoundError:
+		return {}
+	except ValueError as e:
+		backup = f"{path}.defekt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+		shutil.copyfile(path, backup)
+		print(f"⚠️ {path} ist beschädigt ({e}), Kopie unter {backup}; starte mit leerem Stand.")
+		return {}
+
+
+def save_json_state(path, data):
+	"""Speichert eine lokale JSON-Zustandsdatei kompakt (ohne Einrückung) und atomar."""
+	codec.atomic_write(path, codec.encode(data))
+
+
 def load_stats():
 	"""Lädt die Fehlerstatistik aus der JSON-Datei."""
-	if os.path.exists(STATS_FILE):
-		try:
-			with open(STATS_FILE, 'r', encoding='utf-8') as f:
-				return json.load(f)
-		except:
-			return {}
-	return {}
+	return load_json_state(STATS_FILE, codec.STATS)
 
 
 def save_stats(stats):
-	"""Speichert die Fehlerstatistik in der JSON-Datei."""
-	with open(STATS_FILE, 'w', encoding='utf-8') as f:
-		json.dump(stats, f, ensure_ascii=False, indent=2)
+	"""Speichert die Fehlerstatistik in der JSON-Datei (Aufrufer halten file_lock(STATS_FILE))."""
+	save_json_state(STATS_FILE, stats)
+
+
+def load_tombstones():
+	"""Lädt die Statistik entfernter Karten (Karten-ID -> Eintrag)."""
+	return load_json_state(TOMBSTONE_FILE, codec.TOMBSTONES)
+
+
+def save_tombstones(tombstones):
+	"""Speichert die Statistik entfernter Karten."""
+	save_json_state(TOMBSTONE_FILE, tombstones)
 
 
 def update_error_stats(prompt, solution):
 	"""Erhöht den Fehlerzähler für eine Frage."""
-	stats = load_stats()
-	key = f"{prompt} → {solution}"
-	stats[key] = stats.get(key, 0) + 1
-	save_stats(stats)
+	update_error_stats_batch([(prompt, solution)])
+
+
+def update_error_stats_batch(pairs):
+	"""Erhöht die Fehlerzähler für viele (prompt, solution)-Paare mit einem Lese-/Schreibvorgang."""
+	if not pairs:
+		return
+	# Lesen-Ändern-Schreiben unter Sperre, damit parallele Prozesse keine Updates verlieren
+	with file_lock(STATS_FILE):
+		stats = load_stats()
+		previous_stamp = _stats_stamp()
+		keys = []
+		for prompt, solution in pairs:
+			key = f"{prompt} → {solution}"
+			stats[key] = stats.get(key, 0) + 1
+			keys.append(key)
+		save_stats(stats)
+		_record_stats_update(stats, keys, previous_stamp)
 
 
 def get_stats_dataframe():
@@ -115,6 +336,115 @@ def get_stats_dataframe():
 	return df.sort_values('Fehler', ascending=False)
 
 
+@st.cache_resource
+def get_stats_summary():
+	"""Prozessweite Kurzfassung der Fehlerstatistik (Summe, Top-K als Min-Heap)."""
+	return {
+		"lock": threading.Lock(),
+		# (mtime_ns, size) der Datei, die der Kurzfassung zugrunde liegt
+		"stamp": None,
+		"version": 0,
+		"entries": 0,
+		"total": 0,
+		# Min-Heap aus (Fehler, Schlüssel), höchstens STATS_TOP_K Einträge
+		"top": [],
+		"frame": None,
+	}
+
+
+def _stats_stamp():
+	try:
+		info = os.stat(STATS_FILE)
+	except OSError:
+		return None
+	return (info.st_mtime_ns, info.st_size)
+
+
+def _rebuild_stats_summary(summary, stats, stamp):
+	top = heapq.nlargest(STATS_TOP_K, ((v, k) for k, v in stats.items()))
+	heapq.heapify(top)
+	summary.update({
+		"stamp": stamp,
+		"version": summary["version"] + 1,
+		"entries": len(stats),
+		"total": sum(stats.values()),
+		"top": top,
+		"frame": None,
+	})
+
+
+def _record_stats_update(stats, keys, previous_stamp):
+	"""Führt Summe und Top-K nach einem Fehler-Update inkrementell nach (O(K) je Schlüssel)."""
+	summary = get_stats_summary()
+	stamp = _stats_stamp()
+	with summary["lock"]:
+		if summary["stamp"] != previous_stamp:
+			# Datei wurde zwischenzeitlich anders geändert -> einmal neu aufbauen
+			_rebuild_stats_summary(summary, stats, stamp)
+			return
+		summary["total"] += len(keys)
+		summary["entries"] = len(stats)
+		top = summary["top"]
+		for key in dict.fromkeys(keys):
+			count = stats[key]
+			pos = next((i for i, (_c, k) in enumerate(top) if k == key), None)
+			if pos is not None:
+				top[pos] = (count, key)
+				heapq.heapify(top)
+			elif len(top) < STATS_TOP_K:
+				heapq.heappush(top, (count, key))
+			elif (count, key) > top[0]:
+				heapq.heapreplace(top, (count, key))
+		summary["stamp"] = stamp
+		summary["version"] += 1
+		summary["frame"] = None
+
+
+def refresh_stats_summary():
+	"""Liefert die Kurzfassung; neu eingelesen wird nur, wenn die Datei extern geändert wurde."""
+	summary = get_stats_summary()
+	stamp = _stats_stamp()
+	with summary["lock"]:
+		if summary["stamp"] == stamp:
+			return summary
+	stats = load_stats()
+	with summary["lock"]:
+		_rebuild_stats_summary(summary, stats, stamp)
+	return summary
+
+
+def stats_top_frame(summary):
+	"""Top-K-Tabelle für die Seitenleiste, einmal pro Statistik-Version erzeugt."""
+	with summary["lock"]:
+		if summary["frame"] is None or summary["frame"][0] != summary["version"]:
+			items = [(k.split(' → ')[0], k.split(' → ')[1] if ' → ' in k else '', v)
+				for v, k in sorted(summary["top"], reverse=True)]
+			summary["frame"] = (summary["version"], pd.DataFrame(items, columns=['Frage', 'Antwort', 'Fehler']))
+		return summary["frame"][1]
+
+
+@st.fragment
+def render_stats_sidebar():
+	"""Fehlerstatistik in der Seitenleiste (als Fragment, Tabelle je Version gecacht)."""
+	st.markdown("---")
+	st.header("📊 Fehlerstatistik")
+	summary = refresh_stats_summary()
+	if summary["entries"] > 0:
+		st.write(f"Gesamt erfasste Fehler: {summary['total']}")
+		with st.expander(f"Top {STATS_TOP_K} häufigste Fehler"):
+			# Hinweis: `use_container_width` wurde ersetzt durch `width`.
+			# Für volle Breite benutze `width='stretch'`.
+			st.dataframe(stats_top_frame(summary), width='stretch')
+		if st.button("🗑️ Statistik zurücksetzen"):
+			if os.path.exists(STATS_FILE):
+				with file_lock(STATS_FILE):
+					os.remove(STATS_FILE)
+				st.success("Statistik gelöscht!")
+				st.rerun()
+	else:
+		st.info("Noch keine Fehler erfasst.")
+
+
 def save_progress(data):
 	"""Speichert Fortschrittsdaten in Supabase."""
 	try:
@@ -131,17 +461,30 @@ def save_progress(data):
 		st.error(f"❌ Fehler beim Speichern: {e}")
 
 
+def fetch_progress(supabase):
+	"""Liest alle Fortschrittseinträge; Fehler werden weitergereicht (ohne Streamlit)."""
+	response = supabase.table("progress").select("*").execute()
+	print(f"✅ Datenbankabfrage erfolgreich: {len(response.data)} Einträge")
+	return response.data or []
+
+
+def insert_progress_entry(supabase, correct, total):
+	"""Speichert eine Runde; Fehler werden weitergereicht (ohne Streamlit). Gibt den Eintrag zurück."""
+	entry = {
+		"timestamp": datetime.now().isoformat(),
+		"correct": correct,
+		"total": total,
+		"percentage": (correct / total * 100) if total > 0 else 0,
+	}
+	supabase.table("progress").insert(entry).execute()
+	return entry
+
+
 def load_progress():
 	"""Lädt Fortschrittsdaten aus Supabase."""
 	try:
 		print("🔍 Versuche Daten zu laden...")
-		supabase = get_supabase_client()
-		print("✅ Supabase Client erstellt")
-		response = supabase.table("progress").select("*").execute()
-		print(f"✅ Datenbankabfrage erfolgreich: {len(response.data)} Einträge")
-		if response.data:
-			return response.data
-		return []
+		return fetch_progress(get_supabase_client())
 	except Exception as e:
 		print(f"❌ Fehler in load_progress: {e}")
 		st.warning(f"⚠️ Fehler beim Laden: {e}")
@@ -151,16 +494,7 @@ def load_progress():
 def add_progress_entry(correct, total):
 	"""Fügt einen neuen Fortschrittseintrag zu Supabase hinzu."""
 	try:
-		supabase = get_supabase_client()
-		timestamp = datetime.now().isoformat()
-		percentage = (correct / total * 100) if total > 0 else 0
-		
-		supabase.table("progress").insert({
-			"timestamp": timestamp,
-			"correct": correct,
-			"total": total,
-			"percentage": percentage
-		}).execute()
+		insert_progress_entry(get_supabase_client(), correct, total)
 	except Exception as e:
 		st.error(f"❌ Fehler beim Speichern der Runde: {e}")
 
@@ -249,78 +583,1211 @@ def plot_progress():
 	return fig
 
 
-def load_dataframe(uploaded_file):
+def read_sheet_frame(source, sheet):
+    """Liest ein einzelnes Blatt zeilenweise (openpyxl read_only) ein.
+
+    Es werden nur die Spalten Bezeichnung/Bedeutung (plus OPTIONAL_COLUMNS)
+    übernommen; fehlen sie, kommt ein leeres DataFrame mit den gefundenen
+    Kopfzeilen zurück.
+    """
+    if hasattr(source, "seek"):
+        source.seek(0)
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet].iter_rows(values_only=True)
+        header = [str(c).strip() if c is not None else "" for c in next(rows, ())]
+        cols = {c.lower(): i for i, c in enumerate(header) if c}
+        if "bezeichnung" not in cols or "bedeutung" not in cols:
+            return pd.DataFrame(columns=[c for c in header if c])
+        bi, di = cols["bezeichnung"], cols["bedeutung"]
+        width = max(bi, di) + 1
+        idx = [bi, di] + [cols[c.lower()] for c in OPTIONAL_COLUMNS if c.lower() in cols]
+        data = [tuple(row[i] if i < len(row) else None for i in idx) for row in rows if len(row) >= width]
+    finally:
+        wb.close()
+    return pd.DataFrame(data, columns=[header[i] for i in idx])
+
+
+def load_dataframe(uploaded_file, sheet=None, verbose=True):
+    # verbose=False: keine Ausgaben in der Seitenleiste (z.B. aus dem Datei-Watcher)
     try:
         # Bei Dateiänderungen: explizit neu einlesen ohne Caching
-        if isinstance(uploaded_file, str):
+        if sheet is not None:
+            # einzelnes Blatt einer Arbeitsmappe streamen
+            df = read_sheet_frame(uploaded_file, sheet)
+        elif isinstance(uploaded_file, str):
             # Pfad zur lokalen Datei
             df = pd.read_excel(uploaded_file, engine='openpyxl')
         else:
             # Hochgeladene Datei
             df = pd.read_excel(uploaded_file, engine='openpyxl')
     except Exception as e:
-        st.error(f"Fehler beim Lesen der Datei: {e}")
+        if verbose:
+            st.error(f"Fehler beim Lesen der Datei: {e}")
+        else:
+            print(f"❌ Fehler beim Lesen der Datei: {e}")
         return None
 
     # Debug-Ausgabe der tatsächlichen Spaltennamen
-    st.sidebar.write(f"Gefundene Spalten: {list(df.columns)}")
+    if verbose:
+        st.sidebar.write(f"Gefundene Spalten: {list(df.columns)}")
     
     # Normalize column names (accept case-insensitive)
     cols = {c.strip().lower(): c for c in df.columns}
     if "bezeichnung" in cols and "bedeutung" in cols:
-        df = df[[cols["bezeichnung"], cols["bedeutung"]]]
-        df.columns = ["Bezeichnung", "Bedeutung"]
-        return df.dropna(how="all")
+        names = ["Bezeichnung", "Bedeutung"] + [c for c in OPTIONAL_COLUMNS if c.lower() in cols]
+        df = df[[cols[c.lower()] for c in names]]
+        df.columns = names
+        df = df.dropna(how="all", subset=["Bezeichnung", "Bedeutung"])
+        if "Audio" in df.columns:
+            # relative Pfade gelten ab dem Ordner der Deck-Datei
+            base = os.path.dirname(os.path.abspath(uploaded_file)) if isinstance(uploaded_file, str) else DECK_LIBRARY_DIR
+            df = df.assign(Audio=resolve_audio_paths(df["Audio"], base))
+        for col in ("Start", "Ende"):
+            if col in df.columns:
+                # Cue-Zeiten einheitlich in Sekunden (NaN = ganze Datei bzw. bis zum Ende)
+                df = df.assign(**{col: df[col].map(parse_cue_time).astype("float64")})
+        df, dropped, conflicts = dedupe_cards(df)
+        if not verbose:
+            return df
+        if dropped:
+            st.sidebar.info(f"{dropped} doppelte Einträge zusammengeführt.")
+        if len(conflicts) > 0:
+            st.sidebar.warning(f"{len(conflicts)} Bezeichnungen mit abweichender Bedeutung doppelt vorhanden, erste Zeile wird verwendet.")
+            with st.sidebar.expander("Konflikte anzeigen"):
+                st.dataframe(conflicts, width='stretch')
+        return df
     else:
-        st.error(f"Die Excel-Datei muss die Spalten 'Bezeichnung' und 'Bedeutung' enthalten. Gefunden: {list(df.columns)}")
+        message = f"Die Excel-Datei muss die Spalten 'Bezeichnung' und 'Bedeutung' enthalten. Gefunden: {list(df.columns)}"
+        if verbose:
+            st.error(message)
+        else:
+            print(f"❌ {message}")
         return None
 
 
-def start_quiz(df, mode, n_questions, shuffle=True, reset_score=True):
-	pairs = list(df[["Bezeichnung", "Bedeutung"]].itertuples(index=False, name=None))
+@st.cache_resource
+def get_deck_library():
+	"""Prozessweiter Zustand der Deck-Bibliothek (von allen Sessions geteilt)."""
+	return {
+		"lock": threading.Lock(),
+		# Pfad -> ((mtime_ns, size), Metadaten)
+		"meta": {},
+		# LRU: Schlüssel -> (DataFrame, Bytes); älteste Einträge zuerst
+		"decks": OrderedDict(),
+		"bytes": 0,
+		# (Deck, Blatt) -> LRU-Schlüssel der zuletzt geladenen Version
+		"latest": {},
+		# Dateien, deren neue Versionen der Datei-Watcher im Hintergrund lädt
+		"watched": set(),
+	}
+
+
+def read_deck_metadata(source, name=None):
+	"""Liest in einem read_only-Durchlauf Blattnamen, Zeilenzahlen und Kopfzeilen.
+
+	Zellinhalte werden dabei nicht geparst; gültig sind Blätter mit den
+	Spalten Bezeichnung und Bedeutung.
+	"""
+	if hasattr(source, "seek"):
+		source.seek(0)
+	wb = openpyxl.load_workbook(source, read_only=True)
+	try:
+		sheets = []
+		for ws in wb.worksheets:
+			header = next(ws.iter_rows(max_row=1, values_only=True), ())
+			cols = {str(c).strip().lower() for c in header if c is not None}
+			sheets.append({
+				"title": ws.title,
+				# erste Zeile ist die Kopfzeile
+				"rows": max((ws.max_row or 1) - 1, 0),
+				"valid": "bezeichnung" in cols and "bedeutung" in cols,
+			})
+	finally:
+		wb.close()
+	if name is None:
+		name = os.path.splitext(os.path.basename(source))[0]
+	return {
+		"name": name,
+		"path": source,
+		"key": source if isinstance(source, str) else name,
+		"sheets": sheets,
+		"rows": sum(sh["rows"] for sh in sheets if sh["valid"]),
+	}
+
+
+def upload_deck_metadata(uploaded):
+	"""Metadaten einer hochgeladenen Arbeitsmappe (einmal pro Upload gelesen)."""
+	library = get_deck_library()
+	key = f"upload:{uploaded.file_id}"
+	with library["lock"]:
+		cached = library["meta"].get(key)
+	if cached is None:
+		meta = read_deck_metadata(uploaded, name=os.path.splitext(uploaded.name)[0])
+		meta["key"] = key
+		meta["version"] = uploaded.file_id
+		with library["lock"]:
+			library["meta"][key] = (uploaded.file_id, meta)
+	else:
+		meta = dict(cached[1])
+	# bei jedem Rerun ist das UploadedFile ein neues Objekt
+	meta["path"] = uploaded
+	return meta
+
+
+def deck_sheet_options(metas):
+	"""Bildet auswählbare Einträge (Label -> (Metadaten, Blatt)) für alle gültigen Blätter."""
+	options = {}
+	for meta in metas:
+		valid = [sh for sh in meta["sheets"] if sh["valid"]]
+		for sh in valid:
+			label = meta["name"] if len(valid) == 1 else f"{meta['name']} / {sh['title']}"
+			options[label] = (meta, sh)
+	return options
+
+
+def scan_deck_library(directory=DECK_LIBRARY_DIR):
+	"""Listet alle .xlsx-Decks im Ordner; Metadaten werden pro Dateiversion nur einmal gelesen."""
+	library = get_deck_library()
+	decks = []
+	try:
+		entries = sorted(os.scandir(directory), key=lambda e: e.name.lower())
+	except OSError:
+		return decks
+	for entry in entries:
+		if not entry.name.lower().endswith(".xlsx") or entry.name.startswith("~$") or not entry.is_file():
+			continue
+		path = os.path.abspath(entry.path)
+		with library["lock"]:
+			cached = library["meta"].get(path)
+			watched = path in library["watched"]
+		if cached is not None and watched:
+			# neue Versionen tauscht der Watcher erst nach dem Kompilieren ein
+			decks.append(cached[1])
+			continue
+		info = entry.stat()
+		version = (info.st_mtime_ns, info.st_size)
+		if cached is None or cached[0] != version:
+			try:
+				meta = read_deck_metadata(path)
+			except Exception as e:
+				print(f"⚠️ Deck {path} übersprungen: {e}")
+				continue
+			meta["version"] = version
+			with library["lock"]:
+				library["meta"][path] = (version, meta)
+		else:
+			meta = cached[1]
+		decks.append(meta)
+	return decks
+
+
+def _deck_cache_get(key):
+	library = get_deck_library()
+	with library["lock"]:
+		item = library["decks"].get(key)
+		if item is not None:
+			library["decks"].move_to_end(key)
+			return item[0]
+	return None
+
+
+def _deck_cache_put(key, deck):
+	library = get_deck_library()
+	size = int(deck["df"].memory_usage(deep=True).sum())
+	with library["lock"]:
+		old = library["decks"].pop(key, None)
+		if old is not None:
+			library["bytes"] -= old[1]
+		library["decks"][key] = (deck, size)
+		library["bytes"] += size
+		# am längsten nicht genutzte Decks verdrängen, bis das Budget passt
+		while library["bytes"] > DECK_CACHE_BUDGET and len(library["decks"]) > 1:
+			_key, (_deck, old_size) = library["decks"].popitem(last=False)
+			library["bytes"] -= old_size
+
+
+def load_compiled_deck(meta, sheet, verbose=True):
+	"""Parst ein Blatt beim ersten Zugriff und hält DataFrame samt Index im LRU-Cache.
+
+	Liegt eine ältere Version desselben Blatts noch im Cache, werden Index
+	und Statistik nur für hinzugefügte, entfernte und geänderte Karten
+	nachgeführt.
+	"""
+	key = ("deck", meta["key"], meta["version"], sheet)
+	deck = _deck_cache_get(key)
+	if deck is None:
+		df = load_dataframe(meta["path"], sheet, verbose=verbose)
+		if df is None:
+			return None
+		library = get_deck_library()
+		with library["lock"]:
+			previous_key = library["latest"].get((meta["key"], sheet))
+		previous = _deck_cache_get(previous_key) if previous_key not in (None, key) else None
+		if previous is None:
+			deck = new_deck(df)
+		else:
+			diff = diff_decks(previous["df"], df)
+			deck = new_deck(df, update_deck_index(previous["index"], df, diff))
+			migrate_stats(previous["df"], df, diff)
+		_deck_cache_put(key, deck)
+		with library["lock"]:
+			library["latest"][(meta["key"], sheet)] = key
+	return deck
+
+
+def refresh_deck_file(path):
+	"""Kompiliert alle Blätter einer Datei neu und tauscht danach die Metadaten atomar aus.
+
+	Bis zum Austausch sehen Reruns weiterhin die vorherige Version und zahlen
+	so nie die Parse-Kosten.
+	"""
+	library = get_deck_library()
+	info = os.stat(path)
+	version = (info.st_mtime_ns, info.st_size)
+	with library["lock"]:
+		cached = library["meta"].get(path)
+	if cached is not None and cached[0] == version:
+		return
+	meta = read_deck_metadata(path)
+	meta["version"] = version
+	for sh in meta["sheets"]:
+		if sh["valid"]:
+			load_compiled_deck(meta, sh["title"], verbose=False)
+	with library["lock"]:
+		library["meta"][path] = (version, meta)
+	print(f"🔄 Deck neu geladen: {path}")
+
+
+@st.cache_resource
+def start_deck_watcher(path=DEFAULT_XLSX_PATH):
+	"""Startet (einmal pro Prozess) einen Hintergrund-Thread, der das Deck bei Änderungen neu lädt.
+
+	Nutzt watchdog (inotify & Co.), falls installiert, sonst Polling alle
+	DECK_WATCH_INTERVAL Sekunden.
+	"""
+	library = get_deck_library()
+	path = os.path.abspath(path)
+	changed = threading.Event()
+	observer = None
+	try:
+		from watchdog.events import FileSystemEventHandler
+		from watchdog.observers import Observer
+
+		class DeckEventHandler(FileSystemEventHandler):
+			def on_any_event(self, event):
+				paths = (event.src_path, getattr(event, "dest_path", ""))
+				if any(p and os.path.abspath(p) == path for p in paths):
+					changed.set()
+
+		observer = Observer()
+		observer.schedule(DeckEventHandler(), os.path.dirname(path))
+		observer.daemon = True
+		observer.start()
+	except Exception as e:
+		print(f"⚠️ watchdog nicht verfügbar ({e}), nutze Polling.")
+		observer = None
+
+	def run():
+		while True:
+			if observer is not None:
+				changed.wait()
+				# Excel schreibt in mehreren Schritten -> kurz abwarten
+				time.sleep(DECK_WATCH_DEBOUNCE)
+				changed.clear()
+			else:
+				time.sleep(DECK_WATCH_INTERVAL)
+			if not os.path.exists(path):
+				continue
+			try:
+				refresh_deck_file(path)
+			except Exception as e:
+				print(f"❌ Fehler beim Neuladen von {path}: {e}")
+
+	with library["lock"]:
+		library["watched"].add(path)
+	thread = threading.Thread(target=run, name="deck-watcher", daemon=True)
+	thread.start()
+	return {"path": path, "mode": "watchdog" if observer is not None else "polling", "thread": thread}
+
+
+def new_deck(df, index=None):
+	"""Deck-Eintrag für den Cache: DataFrame, Index und Inhalts-Hash des ganzen Decks (einmal berechnet)."""
+	digest = hashlib.blake2b("".join(df["Hash"]).encode("ascii"), digest_size=8).hexdigest()
+	return {"df": df, "index": index if index is not None else build_deck_index(df), "digest": digest}
+
+
+def combine_decks(selection):
+	"""Kombiniert mehrere (Metadaten, Blatt)-Paare zu einem Quiz; das Ergebnis wird ebenfalls gecacht.
+
+	Gibt das Deck ({"df", "index", "digest"}) zurück oder None.
+	"""
+	if len(selection) == 1:
+		return load_compiled_deck(*selection[0])
+	key = ("combo",) + tuple((m["key"], m["version"], sheet) for m, sheet in selection)
+	deck = _deck_cache_get(key)
+	if deck is None:
+		decks = [load_compiled_deck(m, sheet) for m, sheet in selection]
+		frames = [d["df"].drop(columns=["ID", "Hash"]) for d in decks if d is not None]
+		if not frames:
+			return None
+		df, _dropped, _conflicts = dedupe_cards(pd.concat(frames, ignore_index=True))
+		deck = new_deck(df)
+		_deck_cache_put(key, deck)
+	return deck
+
+
+def card_id(key: str) -> str:
+	"""Stabile Karten-ID aus dem Inhalts-Hash der Bezeichnung (identity_series)."""
+	return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def dedupe_cards(df):
+	"""Führt doppelte Bezeichnungen zusammen und vergibt jeder Karte eine ID.
+
+	Gibt (df, Anzahl entfernter Zeilen, Konflikte) zurück; Konflikte sind
+	Duplikate mit abweichender Bedeutung, von denen die erste Zeile bleibt.
+	"""
+	keys = identity_series(df["Bezeichnung"])
+	meanings = identity_series(df["Bedeutung"])
+	# Zeilen ohne Bezeichnung über die Bedeutung identifizieren
+	keys = keys.where(keys != "", "\x1f" + meanings)
+	dup = keys.duplicated(keep="first")
+	conflicts = df[dup & (meanings != meanings.groupby(keys).transform("first"))]
+	if len(conflicts) > 0:
+		# auch für Aufrufer ohne Seitenleiste (Deck-Watcher, API, combine_decks)
+		print(f"⚠️ {len(conflicts)} doppelte Bezeichnungen mit abweichender Bedeutung, erste Zeile bleibt: "
+			f"{', '.join(map(str, conflicts['Bezeichnung'].head(5)))}")
+	df = df[~dup].copy()
+	df["ID"] = keys[~dup].map(card_id)
+	# Inhalts-Hash über beide Seiten, um geänderte Karten zu erkennen
+	content = keys + "\x1f" + meanings
+	if "Audio" in df.columns:
+		# Audio-Pfad (und Cue) nur einbeziehen, wo gesetzt (Hashes von Decks ohne Audio bleiben gleich)
+		audio = df["Audio"].reindex(keys.index).fillna("").astype(str)
+		cue = audio
+		for col in ("Start", "Ende"):
+			if col in df.columns:
+				cue = cue + "\x1f" + df[col].reindex(keys.index).astype(str)
+		content = content.where(audio == "", content + "\x1f" + cue)
+	df["Hash"] = content[~dup].map(card_id)
+	return df.reset_index(drop=True), int(dup.sum()), conflicts
+
+
+def parse_cue_time(value):
+	"""Zeitangabe einer Cue-Spalte in Sekunden (Zahl, "m:ss", "h:mm:ss" oder Excel-Uhrzeit); None wenn leer."""
+	if value is None or (not isinstance(value, str) and pd.isna(value)):
+		return None
+	if isinstance(value, datetime):
+		# Excel-Zeiten ab 24 h liest openpyxl als Datum ab 1900-01-01 (= Tag 1)
+		days = max((value.date() - datetime(1899, 12, 31).date()).days, 0)
+		value = timedelta(days=days, hours=value.hour, minutes=value.minute, seconds=value.second, microseconds=value.microsecond)
+	if isinstance(value, datetime_time):
+		return value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+	if isinstance(value, timedelta):
+		return value.total_seconds()
+	if isinstance(value, (int, float)):
+		return float(value)
+	text = str(value).strip().replace(",", ".")
+	if not text:
+		return None
+	seconds = 0.0
+	try:
+		for part in text.split(":"):
+			seconds = seconds * 60 + float(part)
+	except ValueError:
+		return None
+	return seconds
+
+
+def resolve_audio_paths(values, base):
+	"""Audio-Spalte als absolute Pfade ("" für Karten ohne Audio).
+
+	Erlaubt sind nur relative Pfade, die (auch nach Auflösen von Symlinks)
+	innerhalb von base bleiben; alle anderen werden verworfen.
+	"""
+	root = os.path.realpath(base)
+	rejected = []
+
+	def resolve(p):
+		if p == "":
+			return ""
+		if not os.path.isabs(p) and not os.path.splitdrive(p)[0]:
+			full = os.path.realpath(os.path.join(root, p))
+			try:
+				if os.path.commonpath([root, full]) == root:
+					return full
+			except ValueError:  # anderes Laufwerk
+				pass
+		rejected.append(p)
+		return ""
+
+	paths = values.fillna("").astype(str).str.strip().map(resolve)
+	if rejected:
+		print(f"⚠️ {len(rejected)} Audio-Pfade außerhalb von {root} ignoriert, z.B. {rejected[0]!r}")
+	return paths
+
+
+@st.cache_resource
+def get_audio_registry():
+	"""Prozessweite Verwaltung der Audio-Clips.
+
+	sources: (Pfad, mtime_ns, Größe) -> Cache-Datei, damit Quellen nur einmal
+	gehasht und aufbereitet werden; clips: Cache-Datei -> Inhalt (bytes, LRU
+	innerhalb von AUDIO_CLIPS_BUDGET, Summe in "bytes").
+	"""
+	return {"lock": threading.Lock(), "sources": {}, "digests": {}, "clips": OrderedDict(), "bytes": 0}
+
+
+def source_digest(path):
+	"""Inhalts-Hash einer Quelldatei; pro (Pfad, mtime, Größe) nur einmal berechnet. None, wenn sie fehlt."""
+	try:
+		info = os.stat(path)
+	except OSError:
+		return None
+	registry = get_audio_registry()
+	key = (path, info.st_mtime_ns, info.st_size)
+	with registry["lock"]:
+		digest = registry["digests"].get(key)
+	if digest is None:
+		h = hashlib.blake2b(digest_size=16)
+		with open(path, 'rb') as f:
+			for chunk in iter(lambda: f.read(1 << 20), b""):
+				h.update(chunk)
+		digest = h.hexdigest()
+		with registry["lock"]:
+			registry["digests"][key] = digest
+	return digest
+
+
+def _audio_digest(path):
+	# Einstellungen der Aufbereitung gehören zum Schlüssel
+	digest = hashlib.blake2b(AUDIO_FILTER.encode("utf-8"), digest_size=16)
+	digest.update(source_digest(path).encode("ascii"))
+	return digest.hexdigest()
+
+
+def segment_base(path, start, end, normalize=False):
+	"""Cache-Pfad (ohne Endung) des Ausschnitts start..end einer Quelle oder None."""
+	digest = source_digest(path)
+	if digest is None:
+		return None
+	if normalize:
+		# normalisierte Ausschnitte: die Aufbereitung (AUDIO_FILTER) gehört zum Schlüssel
+		digest = _audio_digest(path)
+	key = hashlib.blake2b(f"{digest}:{start or 0:.3f}:{'' if end is None else f'{end:.3f}'}".encode("ascii"), digest_size=16)
+	return os.path.join(AUDIO_CACHE_DIR, "seg-" + key.hexdigest())
+
+
+def find_segment(path, start, end, normalize=None):
+	"""Bereits geschnittener Clip im Cache oder None.
+
+	normalize: nur diese Variante suchen; None nimmt jede, normalisiert bevorzugt.
+	Kopierte Ausschnitte haben die Endung der Quelle, neu kodierte .m4a.
+	"""
+	for normalize in ((True, False) if normalize is None else (normalize,)):
+		base = segment_base(path, start, end, normalize)
+		if base is None:
+			return None
+		for ext in dict.fromkeys((".m4a",) if normalize else (os.path.splitext(path)[1].lower(), ".m4a")):
+			if os.path.exists(base + ext):
+				return base + ext
+	return None
+
+
+def cut_segment(path, start, end, base, ffmpeg="ffmpeg", normalize=False):
+	"""Schneidet start..end aus path; bevorzugt Stream-Copy, sonst AAC. Gibt (Pfad, kopiert) zurück.
+
+	normalize=True bereitet den Ausschnitt wie prepare_audio_clip auf
+	(AUDIO_FILTER, AAC); das erfordert immer eine Neukodierung.
+	Läuft auch in Worker-Prozessen (nur Modulfunktionen, keine Streamlit-Aufrufe).
+	"""
+	os.makedirs(os.path.dirname(base), exist_ok=True)
+	window = ["-ss", f"{start or 0:.3f}"]
+	if end is not None:
+		window += ["-t", f"{max(end - (start or 0), 0.001):.3f}"]
+	if normalize:
+		attempts = [(".m4a", ["-af", AUDIO_FILTER, "-c:a", "aac", "-b:a", "128k"], False)]
+	else:
+		attempts = [
+			(os.path.splitext(path)[1].lower(), ["-c", "copy"], True),
+			(".m4a", ["-c:a", "aac", "-b:a", "128k"], False),
+		]
+	error = None
+	for ext, codec, copied in attempts:
+		target = base + ext
+		tmp = f"{base}.{uuid.uuid4().hex[:8]}.tmp{ext}"
+		result = subprocess.run(
+			[ffmpeg, "-nostdin", "-y", "-loglevel", "error"] + window + ["-i", path, "-vn", "-map", "0:a:0"] + codec + [tmp],
+			capture_output=True, text=True,
+		)
+		if result.returncode == 0 and os.path.exists(tmp) and os.path.getsize(tmp) > 0:
+			os.replace(tmp, target)
+			return target, copied
+		error = result.stderr.strip()
+		if os.path.exists(tmp):
+			os.remove(tmp)
+	raise RuntimeError(error or "ffmpeg fehlgeschlagen")
+
+
+def prepare_segment_clip(path, start, end):
+	"""Ausschnitt einer Quelle aus dem Cache; fehlt er, wird er jetzt geschnitten (oder None).
+
+	Geschnitten wird per Stream-Copy (SEGMENT_NORMALIZE schaltet die Aufbereitung zu).
+	"""
+	clip = find_segment(path, start, end)
+	if clip is not None:
+		return clip
+	ffmpeg = shutil.which("ffmpeg")
+	base = segment_base(path, start, end, SEGMENT_NORMALIZE)
+	if ffmpeg is None or base is None:
+		return None
+	try:
+		clip, _copied = cut_segment(path, start, end, base, ffmpeg, SEGMENT_NORMALIZE)
+	except (OSError, RuntimeError) as e:
+		print(f"⚠️ Ausschnitt aus {path} konnte nicht erstellt werden: {e}")
+		return None
+	return clip
+
+
+def prepare_audio_clip(path):
+	"""Bereitet eine Audiodatei einmalig auf und gibt den Pfad im AUDIO_CACHE_DIR zurück (oder None).
+
+	Mit ffmpeg wird getrimmt und normalisiert (AAC in .m4a); ohne ffmpeg
+	wird die Quelle unverändert in den Cache übernommen, aber nur bei
+	bekannten Audio-Endungen (AUDIO_MIME_TYPES).
+	"""
+	try:
+		info = os.stat(path)
+	except OSError:
+		return None
+	ffmpeg = shutil.which("ffmpeg")
+	if ffmpeg is None and os.path.splitext(path)[1].lower() not in AUDIO_MIME_TYPES:
+		print(f"⚠️ {path} ist keine bekannte Audiodatei und wird ohne ffmpeg nicht ausgeliefert.")
+		return None
+	registry = get_audio_registry()
+	source_key = (path, info.st_mtime_ns, info.st_size)
+	with registry["lock"]:
+		cached = registry["sources"].get(source_key)
+	if cached is not None and os.path.exists(cached):
+		return cached
+	digest = _audio_digest(path)
+	ext = ".m4a" if ffmpeg else os.path.splitext(path)[1].lower()
+	target = os.path.join(AUDIO_CACHE_DIR, digest + ext)
+	if not os.path.exists(target):
+		os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+		tmp = os.path.join(AUDIO_CACHE_DIR, f".{digest}.{uuid.uuid4().hex[:8]}{ext}")
+		try:
+			if ffmpeg:
+				subprocess.run(
+					[ffmpeg, "-nostdin", "-y", "-loglevel", "error", "-i", path, "-vn",
+					 "-af", AUDIO_FILTER, "-c:a", "aac", "-b:a", "128k", tmp],
+					check=True, capture_output=True,
+				)
+			else:
+				shutil.copyfile(path, tmp)
+			os.replace(tmp, target)
+		except (OSError, subprocess.CalledProcessError) as e:
+			print(f"⚠️ Audio {path} konnte nicht aufbereitet werden: {e}")
+			if os.path.exists(tmp):
+				os.remove(tmp)
+			return None
+	with registry["lock"]:
+		registry["sources"][source_key] = target
+	return target
+
+
+def audio_clip_bytes(path, start=None, end=None):
+	"""Aufbereiteter Clip zu einer Quelldatei (optional Ausschnitt start..end) als (bytes, MIME-Typ) oder None.
+
+	Die Cache-Datei wird einmal gelesen und der Inhalt im Prozess gehalten
+	(LRU, AUDIO_CLIPS_BUDGET); weitere Aufrufe lesen weder Quelle noch
+	Cache-Datei erneut ein, solange der Clip nicht verdrängt wurde.
+	"""
+	if start is None and end is None:
+		clip = prepare_audio_clip(path)
+	else:
+		clip = prepare_segment_clip(path, start, end)
+	if clip is None:
+		return None
+	registry = get_audio_registry()
+	with registry["lock"]:
+		clips = registry["clips"]
+		data = clips.get(clip)
+		if data is not None:
+			clips.move_to_end(clip)
+		else:
+			with open(clip, 'rb') as f:
+				data = f.read()
+			clips[clip] = data
+			registry["bytes"] += len(data)
+			# am längsten nicht gespielte Clips verdrängen, bis das Budget passt
+			while registry["bytes"] > AUDIO_CLIPS_BUDGET and len(clips) > 1:
+				_old, old_data = clips.popitem(last=False)
+				registry["bytes"] -= len(old_data)
+	return data, AUDIO_MIME_TYPES.get(os.path.splitext(clip)[1], "audio/mp4")
+
+
+def deck_audio_cues(df):
+	"""Karten-ID -> (Audio-Pfad, Start, Ende) für alle Karten mit Audio (Start/Ende None = ganze Datei)."""
+	if "Audio" not in df.columns:
+		return {}
+	with_audio = df[df["Audio"].fillna("") != ""]
+	cues = []
+	for col in ("Start", "Ende"):
+		values = with_audio[col] if col in with_audio.columns else pd.Series(float("nan"), index=with_audio.index)
+		cues.append([None if pd.isna(v) else float(v) for v in values])
+	return {cid: (path, start, end) for cid, path, start, end in zip(with_audio["ID"], with_audio["Audio"], *cues)}
+
+
+def build_deck_index(df):
+	"""Hash-Index für O(1)-Zugriff.
+
+	by_id: Karten-ID -> Zeilennummer, by_text: normalisierter Text -> Karten-ID
+	(erste Karte in Deck-Reihenfolge), norm: Karten-ID -> (Bezeichnung, Bedeutung) normalisiert.
+	"""
+	norm = dict(zip(df["ID"], zip(normalize_series(df["Bezeichnung"]), normalize_series(df["Bedeutung"]))))
+	return _index_from_norm(df, norm)
+
+
+def _index_from_norm(df, norm):
+	# ohne Normalisierung: nur Dict-Zugriffe in Deck-Reihenfolge
+	by_text = {"Bezeichnung": {}, "Bedeutung": {}}
+	ordered = {}
+	for cid in df["ID"]:
+		bezeichnung, bedeutung = ordered[cid] = norm[cid]
+		by_text["Bezeichnung"].setdefault(bezeichnung, cid)
+		by_text["Bedeutung"].setdefault(bedeutung, cid)
+	return {
+		"by_id": {cid: row for row, cid in enumerate(df["ID"])},
+		"by_text": by_text,
+		"norm": ordered,
+	}
+
+
+def diff_decks(old_df, new_df):
+	"""Zeilen-Diff zweier Deck-Versionen anhand von Karten-ID und Inhalts-Hash."""
+	old = dict(zip(old_df["ID"], old_df["Hash"]))
+	new = dict(zip(new_df["ID"], new_df["Hash"]))
+	return {
+		"added": [cid for cid in new if cid not in old],
+		"removed": [cid for cid in old if cid not in new],
+		"changed": [cid for cid, h in new.items() if cid in old and old[cid] != h],
+	}
+
+
+def update_deck_index(index, df, diff):
+	"""Index der neuen Deck-Version; normalisiert werden nur hinzugefügte und geänderte Karten.
+
+	Das Ergebnis entspricht build_deck_index(df).
+	"""
+	norm = dict(index["norm"])
+	for cid in diff["removed"]:
+		del norm[cid]
+	touched = diff["added"] + diff["changed"]
+	if touched:
+		part = df.iloc[pd.Index(df["ID"]).get_indexer(touched)]
+		norm.update(zip(touched, zip(normalize_series(part["Bezeichnung"]), normalize_series(part["Bedeutung"]))))
+	return _index_from_norm(df, norm)
+
+
+def migrate_stats(old_df, new_df, diff):
+	"""Überträgt die Fehlerstatistik nach einer Deck-Änderung.
+
+	Statistik entfernter Karten wandert in die Tombstone-Datei, geänderte
+	Karten behalten ihre Zähler, wieder auftauchende Karten bekommen sie zurück.
+	Als geändert gilt jede Karte, deren Text sich ändert, auch wenn nur
+	Groß-/Kleinschreibung oder Satzzeichen (und damit nicht der Hash) abweichen,
+	denn die Statistik-Schlüssel enthalten den Rohtext.
+	"""
+	# Texte wie in den Statistik-Schlüsseln (f"{...}")
+	old_pairs = dict(zip(old_df["ID"], zip(old_df["Bezeichnung"].astype(str), old_df["Bedeutung"].astype(str))))
+	new_pairs = dict(zip(new_df["ID"], zip(new_df["Bezeichnung"].astype(str), new_df["Bedeutung"].astype(str))))
+	renamed = [cid for cid, pair in new_pairs.items() if cid in old_pairs and old_pairs[cid] != pair]
+	if not diff["removed"] and not diff["added"] and not renamed:
+		return
+	# Statistik und Tombstones gemeinsam unter der Sperre der Statistikdatei
+	with file_lock(STATS_FILE):
+		stats = load_stats()
+		tombstones = load_tombstones()
+		changed = False
+
+		def pop_counts(pair):
+			bezeichnung, bedeutung = pair
+			return (stats.pop(f"{bezeichnung} → {bedeutung}", 0), stats.pop(f"{bedeutung} → {bezeichnung}", 0))
+
+		def add_counts(pair, forward, backward):
+			bezeichnung, bedeutung = pair
+			if forward:
+				key = f"{bezeichnung} → {bedeutung}"
+				stats[key] = stats.get(key, 0) + forward
+			if backward:
+				key = f"{bedeutung} → {bezeichnung}"
+				stats[key] = stats.get(key, 0) + backward
+
+		for cid in diff["removed"]:
+			forward, backward = pop_counts(old_pairs[cid])
+			if forward or backward:
+				tombstones[cid] = {
+					"Bezeichnung": old_pairs[cid][0],
+					"Bedeutung": old_pairs[cid][1],
+					"forward": forward,
+					"backward": backward,
+					"removed": datetime.now().isoformat(),
+				}
+				changed = True
+		for cid in renamed:
+			forward, backward = pop_counts(old_pairs[cid])
+			if forward or backward:
+				add_counts(new_pairs[cid], forward, backward)
+				changed = True
+		for cid in diff["added"]:
+			entry = tombstones.pop(cid, None)
+			if entry is not None:
+				add_counts(new_pairs[cid], entry["forward"], entry["backward"])
+				changed = True
+		if changed:
+			save_stats(stats)
+			save_tombstones(tombstones)
+
+
+_TIMING_HEADER = struct.Struct("<4sI")
+
+
+@st.cache_resource
+def get_response_times():
+	"""Prozessweiter Speicher der Antwortzeiten richtiger Antworten.
+
+	Pro Karte ein Platz in parallelen Arrays (ID, Anzahl, Mittelwert, M2);
+	dazu ein Gesamtwert über alle Karten. Jede Antwort kostet O(1).
+	"""
+	store = {
+		"lock": threading.Lock(),
+		"slots": {},
+		"ids": array('Q'),
+		"count": array('I'),
+		"mean": array('d'),
+		"m2": array('d'),
+		"total": [0, 0.0, 0.0],
+		"pending": False,
+	}
+	try:
+		with open(TIMING_FILE, 'rb') as f:
+			raw = f.read()
+		magic, n = _TIMING_HEADER.unpack_from(raw)
+		if magic != b"MTT1":
+			raise ValueError("unbekanntes Format")
+		pos = _TIMING_HEADER.size
+		for name, width in (("ids", 8), ("count", 4), ("mean", 8), ("m2", 8)):
+			store[name].frombytes(raw[pos:pos + n * width])
+			pos += n * width
+		store["slots"] = {cid: slot for slot, cid in enumerate(store["ids"])}
+		for count, mean, m2 in zip(store["count"], store["mean"], store["m2"]):
+			_merge_welford(store["total"], count, mean, m2)
+	except FileNotFoundError:
+		pass
+	except (OSError, ValueError, struct.error) as e:
+		print(f"⚠️ Antwortzeiten konnten nicht geladen werden: {e}")
+	return store
+
+
+def _merge_welford(acc, count, mean, m2):
+	# Zusammenführen zweier Teilstatistiken (Chan et al.)
+	n = acc[0] + count
+	if n == 0:
+		return
+	delta = mean - acc[1]
+	acc[2] += m2 + delta * delta * acc[0] * count / n
+	acc[1] += delta * count / n
+	acc[0] = n
+
+
+def _save_response_times():
+	store = get_response_times()
+	with store["lock"]:
+		store["pending"] = False
+		raw = b"".join((
+			_TIMING_HEADER.pack(b"MTT1", len(store["ids"])),
+			store["ids"].tobytes(),
+			store["count"].tobytes(),
+			store["mean"].tobytes(),
+			store["m2"].tobytes(),
+		))
+	try:
+		with file_lock(TIMING_FILE):
+			codec.atomic_write(TIMING_FILE, raw)
+	except OSError as e:
+		print(f"⚠️ Antwortzeiten konnten nicht gespeichert werden: {e}")
+
+
+def record_response_time(cid, seconds):
+	"""Nimmt eine Antwortzeit für Karte cid (Hex-ID) per Welford-Update auf."""
+	if not 0 < seconds <= RESPONSE_TIME_MAX:
+		return
+	store = get_response_times()
+	key = int(cid, 16)
+	with store["lock"]:
+		slot = store["slots"].get(key)
+		if slot is None:
+			slot = store["slots"][key] = len(store["ids"])
+			store["ids"].append(key)
+			store["count"].append(0)
+			store["mean"].append(0.0)
+			store["m2"].append(0.0)
+		n = store["count"][slot] + 1
+		delta = seconds - store["mean"][slot]
+		store["count"][slot] = n
+		store["mean"][slot] += delta / n
+		store["m2"][slot] += delta * (seconds - store["mean"][slot])
+		_merge_welford(store["total"], 1, seconds, 0.0)
+		scheduled = store["pending"]
+		store["pending"] = True
+	if not scheduled:
+		# Schreiben entprellt, wie bei den Sitzungs-Snapshots
+		timer = threading.Timer(SESSION_SAVE_INTERVAL, _save_response_times)
+		timer.daemon = True
+		timer.start()
+
+
+def response_time_stats(cid):
+	"""(Anzahl, Mittelwert, Varianz) der Antwortzeiten einer Karte oder None."""
+	store = get_response_times()
+	with store["lock"]:
+		slot = store["slots"].get(int(cid, 16))
+		if slot is None:
+			return None
+		n = store["count"][slot]
+		variance = store["m2"][slot] / (n - 1) if n > 1 else 0.0
+		return n, store["mean"][slot], variance
+
+
+def slow_card_ids(ids):
+	"""Karten aus ids, die im Mittel deutlich langsamer richtig beantwortet werden als der Schnitt."""
+	store = get_response_times()
+	with store["lock"]:
+		if store["total"][0] == 0:
+			return set()
+		limit = store["total"][1] * SLOW_FACTOR
+		slots, count, mean = store["slots"], store["count"], store["mean"]
+		slow = set()
+		for cid in ids:
+			slot = slots.get(int(cid, 16))
+			if slot is not None and count[slot] >= 2 and mean[slot] > limit:
+				slow.add(cid)
+	return slow
+
+
+def sample_question_rows(df, n_questions, shuffle=True, stats=None, slow=None):
+	"""Wählt die Zeilen der Fragen einer Runde aus (gewichtet nach Fehlerstatistik).
+
+	Karten, die zwar richtig, aber langsam beantwortet werden (slow, Menge von
+	Karten-IDs), bekommen ein zusätzliches Gewicht.
+	"""
+	if not shuffle:
+		return list(range(min(n_questions, len(df))))
 	
-	if shuffle:
-		# Gewichtete Zufallsauswahl basierend auf Fehlerstatistik
+	# Gewichtete Zufallsauswahl basierend auf Fehlerstatistik
+	if stats is None:
 		stats = load_stats()
-		weighted_pairs = []
+	if slow is None:
+		slow = slow_card_ids(df["ID"])
+	weighted_rows = []
+	
+	for row, (cid, bezeichnung, bedeutung) in enumerate(zip(df["ID"], df["Bezeichnung"], df["Bedeutung"])):
+		# Erstelle Schlüssel für beide Richtungen
+		key_forward = f"{bezeichnung} → {bedeutung}"
+		key_backward = f"{bedeutung} → {bezeichnung}"
 		
-		for pair in pairs:
-			bezeichnung, bedeutung = pair
-			# Erstelle Schlüssel für beide Richtungen
-			key_forward = f"{bezeichnung} → {bedeutung}"
-			key_backward = f"{bedeutung} → {bezeichnung}"
-			
-			# Prüfe Fehleranzahl für beide Richtungen
-			errors_forward = stats.get(key_forward, 0)
-			errors_backward = stats.get(key_backward, 0)
-			max_errors = max(errors_forward, errors_backward)
-			
-			# Füge Frage basierend auf Fehlern mehrfach hinzu
-			# Mindestens 1x, plus 1x pro Fehler (bis max 5x)
-			weight = min(1 + max_errors, 5)
-			weighted_pairs.extend([pair] * weight)
+		# Prüfe Fehleranzahl für beide Richtungen
+		errors_forward = stats.get(key_forward, 0)
+		errors_backward = stats.get(key_backward, 0)
+		max_errors = max(errors_forward, errors_backward)
 		
-		# Zufällige Auswahl aus gewichteter Liste
-		random.shuffle(weighted_pairs)
-		pairs = weighted_pairs[:n_questions]
-	else:
-		pairs = pairs[:n_questions]
+		# Füge Frage basierend auf Fehlern mehrfach hinzu
+		# Mindestens 1x, plus 1x pro Fehler (bis max 5x)
+		weight = min(1 + max_errors + (1 if cid in slow else 0), 5)
+		weighted_rows.extend([row] * weight)
 	
-	st.session_state.current_round_count = len(pairs)
-	st.session_state.questions = pairs
+	# Zufällige Auswahl aus gewichteter Liste
+	random.shuffle(weighted_rows)
+	return weighted_rows[:n_questions]
+
+
+def new_answer_log():
+	"""Kompaktes Antwort-Log einer Session.
+
+	Pro Antwort der laufenden Runde: Fragenindex, Karten-ID (64 Bit) und ein
+	Flag-Byte (Bit 0 = richtig, Bit 1 = Richtung Bedeutung → Bezeichnung).
+	Eingaben werden nur für falsche Antworten behalten; Summen laufen mit.
+	"""
+	return {
+		"qidx": array('I'),
+		"cards": array('Q'),
+		"flags": bytearray(),
+		"wrong_inputs": {},
+		"total": 0,
+		"correct": 0,
+		"round_total": 0,
+		"round_correct": 0,
+	}
+
+
+def log_answer(log, qidx, cid, backward, correct, user_input):
+	"""Hängt eine Antwort an das Log an und führt die Zähler nach (O(1))."""
+	log["qidx"].append(qidx)
+	log["cards"].append(int(cid, 16))
+	log["flags"].append((1 if correct else 0) | (2 if backward else 0))
+	if not correct:
+		log["wrong_inputs"][len(log["flags"]) - 1] = user_input
+	log["total"] += 1
+	log["round_total"] += 1
+	if correct:
+		log["correct"] += 1
+		log["round_correct"] += 1
+
+
+def last_answer_correct(log):
+	return bool(log["flags"]) and bool(log["flags"][-1] & 1)
+
+
+def round_wrong_answers(log, questions):
+	"""Falsche Antworten der laufenden Runde als (prompt, solution, user_input)."""
+	wrong = []
+	for pos, user_input in log["wrong_inputs"].items():
+		bezeichnung, bedeutung = questions[log["qidx"][pos]]
+		if log["flags"][pos] & 2:
+			wrong.append((bedeutung, bezeichnung, user_input))
+		else:
+			wrong.append((bezeichnung, bedeutung, user_input))
+	return wrong
+
+
+def clear_round_log(log):
+	"""Leert die Antworten der abgeschlossenen Runde (Ereignisse stehen bereits im Ereignis-Log)."""
+	log["qidx"] = array('I')
+	log["cards"] = array('Q')
+	log["flags"] = bytearray()
+	log["wrong_inputs"] = {}
+	log["round_total"] = 0
+	log["round_correct"] = 0
+
+
+@st.cache_resource
+def get_event_buffer():
+	"""Prozessweiter Puffer für Antwort-Ereignisse (spaltenweise, bis zum nächsten Schreiben)."""
+	return {
+		"lock": threading.Lock(),
+		"ts": array('d'),
+		"cards": array('Q'),
+		"flags": bytearray(),
+	}
+
+
+def record_answer_event(cid, backward, correct):
+	"""Hängt ein Ereignis (eine Zeile pro ausgewerteter Antwort) an das Ereignis-Log an."""
+	buffer = get_event_buffer()
+	with buffer["lock"]:
+		buffer["ts"].append(time.time())
+		buffer["cards"].append(int(cid, 16))
+		buffer["flags"].append((1 if correct else 0) | (2 if backward else 0))
+		flush_now = len(buffer["flags"]) >= EVENT_FLUSH_ROWS
+	if flush_now:
+		flush_answer_events()
+
+
+def flush_answer_events():
+	"""Schreibt gepufferte Ereignisse als neue Teildatei je Woche (am Rundenende bzw. ab EVENT_FLUSH_ROWS Zeilen).
+
+	Bestehende Dateien werden nicht angefasst (nur anhängen, O(neue Zeilen));
+	erst ab EVENT_COMPACT_FILES Teildateien führt compact_week_events eine
+	Woche zusammen.
+	"""
+	buffer = get_event_buffer()
+	with buffer["lock"]:
+		ts, cards, flags = buffer["ts"], buffer["cards"], buffer["flags"]
+		buffer.update({"ts": array('d'), "cards": array('Q'), "flags": bytearray()})
+	if not flags:
+		return
+	flag_values = pd.Series(memoryview(flags).cast('B'), dtype="uint8")
+	events = pd.DataFrame({
+		"ts": pd.to_datetime(pd.Series(ts, dtype="float64"), unit="s"),
+		"card": pd.Series(cards, dtype="uint64"),
+		"backward": (flag_values & 2).astype(bool),
+		"correct": (flag_values & 1).astype(bool),
+	})
+	weeks = events["ts"].dt.strftime("%G-W%V")
+	try:
+		for week, part in events.groupby(weeks):
+			_append_week_events(week, part)
+	except (OSError, ImportError, ValueError) as e:
+		print(f"⚠️ Antwort-Ereignisse konnten nicht gespeichert werden: {e}")
+
+
+def _week_files(directory):
+	# Punkt-Präfix: Sperr- und halb geschriebene Dateien werden beim Lesen ignoriert
+	return sorted(
+		os.path.join(directory, name) for name in os.listdir(directory)
+		if name.endswith(".parquet") and not name.startswith(".")
+	)
+
+
+def _write_event_file(directory, events, prefix):
+	# eindeutiger Name, erst halb geschrieben (Punkt-Präfix), dann sichtbar
+	name = f"{prefix}-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+	tmp = os.path.join(directory, "." + name)
+	events.to_parquet(tmp, index=False)
+	os.replace(tmp, os.path.join(directory, name))
+
+
+def _append_week_events(week, part):
+	directory = os.path.join(EVENTS_DIR, f"woche={week}")
+	os.makedirs(directory, exist_ok=True)
+	_write_event_file(directory, part, "teil")
+	if len(_week_files(directory)) >= EVENT_COMPACT_FILES:
+		compact_week_events(week)
+
+
+def compact_week_events(week):
+	"""Führt die Teildateien einer Woche zu einer Datei zusammen (O(Woche), selten)."""
+	directory = os.path.join(EVENTS_DIR, f"woche={week}")
+	with file_lock(os.path.join(EVENTS_DIR, f".woche={week}")):
+		files = _week_files(directory)
+		if len(files) < 2:
+			return
+		merged = pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+		_write_event_file(directory, merged, "woche")
+		# nur die gelesenen Dateien entfernen; parallel angehängte Teile bleiben
+		for path in files:
+			os.remove(path)
+
+
+def load_answer_events(columns=None, weeks=None):
+	"""Liest das Ereignis-Log (nur benötigte Spalten/Wochen) als DataFrame oder None."""
+	if not os.path.isdir(EVENTS_DIR):
+		return None
+	filters = [("woche", "in", list(weeks))] if weeks else None
+	try:
+		events = pd.read_parquet(EVENTS_DIR, columns=columns, filters=filters)
+	except (OSError, ImportError, ValueError) as e:
+		print(f"⚠️ Antwort-Ereignisse konnten nicht gelesen werden: {e}")
+		return None
+	if "woche" in events.columns:
+		events["woche"] = events["woche"].astype(str)
+	return events
+
+
+def card_accuracy_by_week(weeks=None):
+	"""Trefferquote je Karte und Woche: DataFrame mit card, woche, antworten, quote."""
+	events = load_answer_events(columns=["card", "correct", "woche"], weeks=weeks)
+	if events is None or events.empty:
+		return None
+	grouped = events.groupby(["card", "woche"], observed=True)["correct"]
+	return grouped.agg(antworten="size", quote="mean").reset_index()
+
+
+def _recent_weeks(n):
+	today = datetime.now()
+	return [(today - pd.Timedelta(weeks=i)).strftime("%G-W%V") for i in range(n)]
+
+
+def plot_card_accuracy(df):
+	"""Heatmap der Trefferquote je Karte und Woche für die schwächsten Karten des Decks."""
+	accuracy = card_accuracy_by_week(_recent_weeks(ACCURACY_CHART_WEEKS))
+	if accuracy is None:
+		return None
+	labels = pd.Series(df["Bezeichnung"].to_numpy(), index=df["ID"].map(lambda h: int(h, 16)).astype("uint64"))
+	accuracy = accuracy[accuracy["card"].isin(labels.index)]
+	if accuracy.empty:
+		return None
+	# schwächste Karten über den gesamten Zeitraum (gewichtet nach Anzahl Antworten)
+	accuracy = accuracy.assign(richtig=accuracy["quote"] * accuracy["antworten"])
+	per_card = accuracy.groupby("card")[["richtig", "antworten"]].sum()
+	weakest = (per_card["richtig"] / per_card["antworten"]).nsmallest(ACCURACY_CHART_CARDS).index
+	matrix = (
+		accuracy[accuracy["card"].isin(weakest)]
+		.pivot(index="card", columns="woche", values="quote")
+		.reindex(index=weakest)
+		.sort_index(axis=1)
+	)
+	fig = go.Figure(go.Heatmap(
+		z=matrix.to_numpy() * 100,
+		x=list(matrix.columns),
+		y=[str(labels[card]) for card in matrix.index],
+		zmin=0,
+		zmax=100,
+		colorscale='RdYlGn',
+		colorbar=dict(title='%'),
+		hovertemplate='%{y}<br>%{x}: %{z:.0f}%<extra></extra>',
+	))
+	fig.update_layout(
+		title=dict(
+			text='Trefferquote je Karte und Woche',
+			font=dict(size=18, color='#0f172a', family='Arial Black')
+		),
+		yaxis=dict(autorange='reversed'),
+		plot_bgcolor='rgba(255,255,255,0.9)',
+		paper_bgcolor='rgba(255,255,255,0.9)',
+		height=max(300, 28 * len(matrix) + 150),
+	)
+	return fig
+
+
+@st.cache_resource
+def get_prefetch_pool():
+	"""Hintergrund-Worker, die während der Ergebnisanzeige die nächste Runde ziehen."""
+	return ThreadPoolExecutor(max_workers=2, thread_name_prefix="round-prefetch")
+
+
+def _next_round_key(deck, n_questions, shuffle):
+	# Deck-Inhalt (gecachter Hash), Einstellungen und Stand der Fehlerstatistik bestimmen die Auswahl
+	return (deck["digest"], n_questions, shuffle, _stats_stamp())
+
+
+def prefetch_next_round(deck, n_questions, shuffle):
+	"""Startet das Ziehen der nächsten Runde im Hintergrund (falls noch nicht aktuell)."""
+	key = _next_round_key(deck, n_questions, shuffle)
+	pending = st.session_state.get("next_round")
+	if pending is not None:
+		if pending["key"] == key:
+			return
+		pending["future"].cancel()
+	future = get_prefetch_pool().submit(sample_question_rows, deck["df"], n_questions, shuffle)
+	st.session_state.next_round = {"key": key, "future": future}
+
+
+def take_next_round(deck, n_questions, shuffle):
+	"""Vorberechnete Zeilen der nächsten Runde oder None, wenn sie nicht mehr passen."""
+	pending = st.session_state.pop("next_round", None)
+	if pending is None:
+		return None
+	if pending["key"] != _next_round_key(deck, n_questions, shuffle):
+		# Deck, Einstellungen oder Statistik haben sich geändert -> verwerfen
+		pending["future"].cancel()
+		return None
+	try:
+		return pending["future"].result()
+	except Exception as e:
+		print(f"⚠️ Vorberechnung der nächsten Runde fehlgeschlagen: {e}")
+		return None
+
+
+def start_quiz(df, mode, n_questions, shuffle=True, reset_score=True, rows=None):
+	if rows is None:
+		rows = sample_question_rows(df, n_questions, shuffle)
+	
+	st.session_state.current_round_count = len(rows)
+	# nur die gezogenen Zeilen anfassen (O(Fragen) statt O(Deck))
+	st.session_state.questions = list(zip(df["Bezeichnung"].take(rows), df["Bedeutung"].take(rows)))
+	st.session_state.question_ids = list(df["ID"].take(rows))
+	# für Snapshots einmal pro Runde gepackt (8 Bytes je Karte)
+	st.session_state.question_ids_packed = bytes.fromhex("".join(st.session_state.question_ids))
 	st.session_state.index = 0
 	# Only reset score/answers if requested (keep cumulative across auto-restarts)
-	if reset_score:
-		st.session_state.score = 0
-		st.session_state.answers = []
-		st.session_state.round_offset = 0
+	if reset_score or "answer_log" not in st.session_state:
+		st.session_state.answer_log = new_answer_log()
 	else:
-		if "score" not in st.session_state:
-			st.session_state.score = 0
-		if "answers" not in st.session_state:
-			st.session_state.answers = []
-		# mark where this round's answers will start in the cumulative answers list
-		st.session_state.round_offset = len(st.session_state.answers)
+		# cumulative counters stay, the per-round arrays start empty
+		clear_round_log(st.session_state.answer_log)
 	st.session_state.mode = mode
 	# hide summary view when starting/restarting
 	st.session_state.show_summary = False
@@ -330,11 +1797,466 @@ def start_quiz(df, mode, n_questions, shuffle=True, reset_score=True):
 	st.session_state.progress_saved = False
 	# reset answered flag so inputs are enabled for the new round
 	st.session_state.answered = False
+	st.session_state.shown_at = None
+	st.session_state.report_path = None
+	st.session_state.events_flushed = False
+	persist_session()
+
+
+def _session_path(token):
+	ext = "msgpack" if msgpack is not None else "json"
+	return os.path.join(SESSION_DIR, f"{token}.{ext}")
+
+
+def session_refs():
+	"""Stand der laufenden Runde in O(1): Referenzen auf das Antwort-Log plus dessen Länge.
+
+	Das Log wächst innerhalb einer Runde nur am Ende und wird zur nächsten
+	Runde durch neue Objekte ersetzt; die ersten n Einträge bleiben also gültig.
+	"""
+	log = st.session_state.answer_log
+	return {
+		"backward": st.session_state.mode != "Bezeichnung → Bedeutung",
+		"index": st.session_state.index,
+		"ids": st.session_state.question_ids_packed,
+		"log": (log["qidx"], log["cards"], log["flags"], log["wrong_inputs"]),
+		"n": len(log["flags"]),
+		"counters": [log["total"], log["correct"], log["round_total"], log["round_correct"]],
+		"state": [
+			st.session_state.get("answered", False),
+			st.session_state.get("finished_round", False),
+			st.session_state.get("show_summary", False),
+			st.session_state.get("progress_saved", False),
+		],
+	}
+
+
+def build_session_snapshot(refs):
+	"""Kompakter Snapshot der Runde (Karten-IDs, Index, Antwort-Log) aus session_refs()."""
+	qidx, cards, flags, wrong_inputs = refs["log"]
+	n = refs["n"]
+	return {
+		"v": 1,
+		"backward": refs["backward"],
+		"index": refs["index"],
+		"ids": refs["ids"],
+		"qidx": qidx[:n].tobytes(),
+		"cards": cards[:n].tobytes(),
+		"flags": bytes(flags[:n]),
+		# list() kopiert atomar, auch wenn der Callback gerade eine Antwort anhängt
+		"wrong_inputs": {str(pos): text for pos, text in list(wrong_inputs.items()) if pos < n},
+		"counters": refs["counters"],
+		"state": refs["state"],
+	}
+
+
+def _encode_snapshot(snapshot):
+	if msgpack is not None:
+		return msgpack.packb(snapshot, use_bin_type=True)
+	data = {k: (v.hex() if isinstance(v, bytes) else v) for k, v in snapshot.items()}
+	return codec.encode(data)
+
+
+def _decode_snapshot(raw):
+	if msgpack is not None:
+		return msgpack.unpackb(raw, raw=False)
+	data = codec.decode(raw)
+	for k in ("ids", "qidx", "cards", "flags"):
+		data[k] = bytes.fromhex(data[k])
+	return data
+
+
+@st.cache_resource
+def get_session_writer():
+	"""Prozessweiter, entprellter Schreiber für Snapshots (Token -> ausstehende Daten)."""
+	return {"lock": threading.Lock(), "pending": {}}
+
+
+def _flush_session(token):
+	writer = get_session_writer()
+	with writer["lock"]:
+		refs = writer["pending"].pop(token, None)
+	if refs is None:
+		return
+	try:
+		os.makedirs(SESSION_DIR, exist_ok=True)
+		codec.atomic_write(_session_path(token), _encode_snapshot(build_session_snapshot(refs)))
+	except OSError as e:
+		print(f"⚠️ Snapshot konnte nicht gespeichert werden: {e}")
+
+
+def persist_session(immediate=False):
+	"""Merkt den aktuellen Stand vor; geschrieben wird spätestens nach SESSION_SAVE_INTERVAL.
+
+	Im Callback fällt nur O(1)-Arbeit an (session_refs); Snapshot bauen und
+	kodieren läuft erst beim Schreiben. Mehrere Antworten innerhalb des
+	Intervalls ergeben nur einen Schreibvorgang mit dem jeweils neuesten Stand.
+	immediate=True schreibt sofort (z.B. nachdem die Runde gespeichert wurde,
+	damit ein Fortsetzen sie nicht doppelt speichert).
+	"""
+	token = st.session_state.get("session_token")
+	if not token or not st.session_state.get("questions"):
+		return
+	refs = session_refs()
+	writer = get_session_writer()
+	with writer["lock"]:
+		scheduled = token in writer["pending"]
+		writer["pending"][token] = refs
+	if immediate:
+		# ein ggf. laufender Timer findet danach nichts mehr vor
+		_flush_session(token)
+	elif not scheduled:
+		timer = threading.Timer(SESSION_SAVE_INTERVAL, _flush_session, args=(token,))
+		timer.daemon = True
+		timer.start()
+
+
+def ensure_session_token():
+	"""Token der Sitzung; steht in der URL, damit ein Reconnect dieselbe Sitzung findet."""
+	token = st.session_state.get("session_token") or st.query_params.get("sitzung")
+	if not token or not re.fullmatch(r"[0-9a-f]{32}", token):
+		token = uuid.uuid4().hex
+	st.session_state.session_token = token
+	if st.query_params.get("sitzung") != token:
+		st.query_params["sitzung"] = token
+	return token
+
+
+def resume_session(df, token):
+	"""Stellt eine unterbrochene Runde aus dem Snapshot wieder her (ohne neu zu mischen)."""
+	path = _session_path(token)
+	if not os.path.exists(path):
+		return False
+	try:
+		with open(path, 'rb') as f:
+			snapshot = _decode_snapshot(f.read())
+	except Exception as e:
+		print(f"⚠️ Snapshot {path} nicht lesbar: {e}")
+		return False
+	raw_ids = snapshot["ids"]
+	ids = [raw_ids[i:i + 8].hex() for i in range(0, len(raw_ids), 8)]
+	rows = {cid: row for row, cid in enumerate(df["ID"])}
+	if not ids or any(cid not in rows for cid in ids):
+		# Deck hat sich geändert oder Runde ist leer -> nicht fortsetzen
+		return False
+	pairs = list(df[["Bezeichnung", "Bedeutung"]].itertuples(index=False, name=None))
+	log = new_answer_log()
+	log["qidx"].frombytes(snapshot["qidx"])
+	log["cards"].frombytes(snapshot["cards"])
+	log["flags"] = bytearray(snapshot["flags"])
+	log["wrong_inputs"] = {int(pos): text for pos, text in snapshot["wrong_inputs"].items()}
+	log["total"], log["correct"], log["round_total"], log["round_correct"] = snapshot["counters"]
+	st.session_state.questions = [pairs[rows[cid]] for cid in ids]
+	st.session_state.question_ids = ids
+	st.session_state.question_ids_packed = raw_ids
+	st.session_state.current_round_count = len(ids)
+	st.session_state.index = min(snapshot["index"], len(ids) - 1)
+	st.session_state.answer_log = log
+	st.session_state.mode = "Bedeutung → Bezeichnung" if snapshot["backward"] else "Bezeichnung → Bedeutung"
+	(st.session_state.answered, st.session_state.finished_round,
+		st.session_state.show_summary, st.session_state.progress_saved) = snapshot["state"]
+	return True
 
 
 def check_answer(user_ans: str, correct: str) -> bool:
 	return normalize(user_ans) == normalize(correct)
 
+
+def grade_answers(prompts, solutions, user_answers) -> pd.DataFrame:
+	"""Bewertet einen kompletten Antwortbogen in einem vektorisierten Durchlauf."""
+	graded = pd.DataFrame({
+		"Prompt": pd.Series(prompts, dtype=object).reset_index(drop=True),
+		"Lösung": pd.Series(solutions, dtype=object).reset_index(drop=True),
+		"Deine Antwort": pd.Series(user_answers, dtype=object).reset_index(drop=True).fillna(""),
+	})
+	graded["Korrekt"] = normalize_series(graded["Deine Antwort"]) == normalize_series(graded["Lösung"])
+	return graded
+
+
+def record_exam_result(graded: pd.DataFrame, ids, backward):
+	"""Speichert Fehler, Antwort-Ereignisse und Fortschritt einer Prüfung gesammelt (ein Stats-Update, ein Insert).
+
+	ids: Karten-IDs in der Reihenfolge der Zeilen von graded. Ohne Zeilen wird nichts gespeichert.
+	"""
+	if graded.empty:
+		return
+	for cid, correct in zip(ids, graded["Korrekt"]):
+		record_answer_event(cid, backward, bool(correct))
+	flush_answer_events()
+	wrong = graded.loc[~graded["Korrekt"], ["Prompt", "Lösung"]]
+	update_error_stats_batch(list(wrong.itertuples(index=False, name=None)))
+	add_progress_entry(int(graded["Korrekt"].sum()), len(graded))
+
+
+def load_answer_sheet(uploaded_file):
+	"""Liest einen Antwortbogen (.csv/.xlsx) mit den Spalten 'Frage' und 'Antwort'."""
+	try:
+		if uploaded_file.name.lower().endswith(".csv"):
+			sheet = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False)
+		else:
+			sheet = pd.read_excel(uploaded_file, engine='openpyxl', dtype=str)
+	except Exception as e:
+		st.error(f"Fehler beim Lesen des Antwortbogens: {e}")
+		return None
+	cols = {str(c).strip().lower(): c for c in sheet.columns}
+	if "frage" not in cols or "antwort" not in cols:
+		st.error(f"Der Antwortbogen muss die Spalten 'Frage' und 'Antwort' enthalten. Gefunden: {list(sheet.columns)}")
+		return None
+	sheet = sheet[[cols["frage"], cols["antwort"]]]
+	sheet.columns = ["Frage", "Antwort"]
+	return sheet.dropna(subset=["Frage"])
+
+
+def show_exam_result(graded: pd.DataFrame):
+	"""Zeigt das Ergebnis einer Prüfung an."""
+	if graded.empty:
+		st.info("Keine Fragen bewertet, es wurde nichts gespeichert.")
+		return
+	n_correct = int(graded["Korrekt"].sum())
+	st.header("Ergebnis")
+	st.write(f"Richtige Antworten: {n_correct} / {len(graded)}")
+	wrong = graded.loc[~graded["Korrekt"], ["Prompt", "Lösung", "Deine Antwort"]]
+	if len(wrong) > 0:
+		st.subheader("Falsche Antworten")
+		st.dataframe(wrong, width='stretch')
+	else:
+		st.success("Keine falschen Antworten.")
+
+
+def run_exam(df, index, mode, n_questions, shuffle):
+	"""Prüfungsmodus: alle Fragen auf einmal bzw. hochgeladener Antwortbogen, eine Bewertung.
+
+	index: gecachter Deck-Index (build_deck_index) für die Zuordnung der Fragen.
+	"""
+	st.header("📝 Prüfungsmodus")
+	if mode == "Bezeichnung → Bedeutung":
+		prompt_col, solution_col = "Bezeichnung", "Bedeutung"
+	else:
+		prompt_col, solution_col = "Bedeutung", "Bezeichnung"
+	backward = mode != "Bezeichnung → Bedeutung"
+
+	sheet_file = st.file_uploader("Antwortbogen hochladen (.csv/.xlsx, Spalten: Frage, Antwort)",
+		type=["csv", "xlsx"], key="exam_sheet")
+	if sheet_file is not None:
+		# gleiche Datei nicht bei jedem Rerun erneut bewerten/speichern
+		if st.session_state.get("exam_sheet_id") != sheet_file.file_id:
+			sheet = load_answer_sheet(sheet_file)
+			if sheet is None:
+				return
+			rows = normalize_series(sheet["Frage"]).map(index["by_text"][prompt_col]).map(index["by_id"])
+			unknown = rows.isna()
+			if unknown.any():
+				st.warning(f"{int(unknown.sum())} Fragen aus dem Antwortbogen sind nicht im Deck und werden ignoriert.")
+			sheet = sheet[~unknown]
+			rows = rows[~unknown].astype(int)
+			# Fragen im Rohtext des Decks, damit die Statistik-Schlüssel zu den Karten passen
+			graded = grade_answers(df[prompt_col].iloc[rows], df[solution_col].iloc[rows], sheet["Antwort"])
+			record_exam_result(graded, df["ID"].iloc[rows], backward)
+			st.session_state.exam_sheet_id = sheet_file.file_id
+			st.session_state.exam_result = graded
+		show_exam_result(st.session_state.exam_result)
+		return
+
+	# neu ziehen bei Klick oder wenn sich Anzahl/Reihenfolge geändert hat
+	exam_params = (n_questions, shuffle)
+	if st.button("Neue Prüfung") or st.session_state.get("exam_params") != exam_params:
+		st.session_state.exam_params = exam_params
+		rows = sample_question_rows(df, n_questions, shuffle)
+		st.session_state.exam_questions = list(zip(df["Bezeichnung"].take(rows), df["Bedeutung"].take(rows)))
+		st.session_state.exam_ids = list(df["ID"].take(rows))
+		st.session_state.exam_id = st.session_state.get("exam_id", 0) + 1
+		st.session_state.exam_result = None
+	pairs = st.session_state.exam_questions
+	if mode == "Bezeichnung → Bedeutung":
+		prompts = [p for p, _s in pairs]
+		solutions = [s for _p, s in pairs]
+	else:
+		prompts = [s for _p, s in pairs]
+		solutions = [p for p, _s in pairs]
+
+	exam_id = st.session_state.exam_id
+	with st.form(key=f"exam_form_{exam_id}"):
+		for i, prompt in enumerate(prompts):
+			st.text_input(f"{i+1}. {prompt}", key=f"exam_{exam_id}_{i}")
+		submitted = st.form_submit_button("Alle Antworten abgeben",
+			disabled=st.session_state.get("exam_result") is not None)
+	if submitted and st.session_state.get("exam_result") is None:
+		user_answers = [st.session_state.get(f"exam_{exam_id}_{i}", "") for i in range(len(prompts))]
+		graded = grade_answers(prompts, solutions, user_answers)
+		record_exam_result(graded, st.session_state.exam_ids, backward)
+		st.session_state.exam_result = graded
+	if st.session_state.get("exam_result") is not None:
+		show_exam_result(st.session_state.exam_result)
+
+
+def _submit_answer(input_key, prompt, solution):
+	"""Callback für "Absenden": wertet die Antwort aus, bevor das Fragment neu läuft."""
+	if st.session_state.get("answered", False):
+		return
+	user_input = st.session_state.get(input_key, "")
+	correct = check_answer(user_input, solution)
+	idx = st.session_state.index
+	cid = st.session_state.question_ids[idx]
+	backward = st.session_state.mode != "Bezeichnung → Bedeutung"
+	shown_at = st.session_state.get("shown_at")
+	if correct and shown_at is not None:
+		record_response_time(cid, time.monotonic() - shown_at)
+	st.session_state.shown_at = None
+	log = st.session_state.answer_log
+	log_answer(log, idx, cid, backward, correct, user_input)
+	record_answer_event(cid, backward, correct)
+	st.session_state.answered = True
+	last = idx == len(st.session_state.questions) - 1
+	if correct:
+		# advance automatically on correct answer
+		if not last:
+			st.session_state.index += 1
+			st.session_state.answered = False
+	else:
+		# Fehlerstatistik aktualisieren
+		update_error_stats(prompt, solution)
+	# letzte Frage richtig oder alle Fragen beantwortet -> Runde fertig
+	if (correct and last) or log["round_total"] == len(st.session_state.questions):
+		st.session_state.finished_round = True
+		# das Fragment baut danach einmal die ganze Seite neu auf
+		st.session_state.finish_rerun = True
+	persist_session()
+
+
+def _step_question(delta):
+	"""Callback für "Zurück"/"Nächste Frage"."""
+	new_index = st.session_state.index + delta
+	if 0 <= new_index < len(st.session_state.questions):
+		st.session_state.index = new_index
+		st.session_state.answered = False
+		st.session_state.shown_at = None
+		persist_session()
+
+
+def iter_result_report(round_correct, round_total, wrong, pages=None, report_name=None):
+	"""Erzeugt den HTML-Körper des Ergebnisberichts stückweise.
+
+	wrong: Liste (prompt, solution, user_input); die Tabelle wird in Seiten
+	zu RESULT_PAGE_SIZE Zeilen aufgeteilt, pages begrenzt deren Anzahl.
+	report_name: Dateiname des vollständigen Berichts (Download in der App).
+	"""
+	if round_total == 0:
+		yield '<p>Keine Ergebnisse vorhanden.</p>'
+		return
+	yield f"<p>Richtige Antworten (diese Runde): <strong>{round_correct}</strong> / {round_total}</p>"
+	if not wrong:
+		yield '<p>Keine falschen Antworten in dieser Runde.</p>'
+		return
+	yield "<h2>Falsche Antworten</h2>"
+	n_pages = (len(wrong) + RESULT_PAGE_SIZE - 1) // RESULT_PAGE_SIZE
+	shown = n_pages if pages is None else min(pages, n_pages)
+	for page in range(shown):
+		chunk = wrong[page * RESULT_PAGE_SIZE:(page + 1) * RESULT_PAGE_SIZE]
+		if n_pages > 1:
+			yield f"<h3 id='seite{page + 1}'>Seite {page + 1} / {n_pages}</h3>"
+		yield RESULT_TABLE_HEAD
+		yield "".join(
+			RESULT_ROW_TEMPLATE.substitute(
+				prompt=html_lib.escape(str(p)),
+				solution=html_lib.escape(str(s)),
+				answer=html_lib.escape(str(u)),
+			)
+			for p, s, u in chunk
+		)
+		yield "</tbody></table>"
+	if shown < n_pages:
+		yield f"<p>… {len(wrong) - shown * RESULT_PAGE_SIZE} weitere falsche Antworten"
+		if report_name:
+			yield f" im vollständigen Bericht <code>{html_lib.escape(report_name)}</code> (Download in der App)"
+		yield "</p>"
+
+
+def render_result_report(round_correct, round_total, wrong, pages=None, report_name=None):
+	"""Ergebnisbericht als vollständige HTML-Seite."""
+	body = "".join(iter_result_report(round_correct, round_total, wrong, pages, report_name))
+	return RESULT_PAGE_TEMPLATE.substitute(body=body)
+
+
+def save_result_report(round_correct, round_total, wrong):
+	"""Schreibt den vollständigen Bericht nach REPORTS_DIR und gibt den Pfad zurück.
+
+	Der Dateiname enthält das Sitzungs-Token (bzw. eine Zufalls-ID), damit
+	gleichzeitig endende Sitzungen sich nicht gegenseitig überschreiben.
+	"""
+	os.makedirs(REPORTS_DIR, exist_ok=True)
+	suffix = (st.session_state.get("session_token") or uuid.uuid4().hex)[:12]
+	path = os.path.join(REPORTS_DIR, f"ergebnis_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{suffix}.html")
+	head, tail = RESULT_PAGE_TEMPLATE.substitute(body="\x00").split("\x00")
+	with open(path, 'w', encoding='utf-8') as f:
+		f.write(head)
+		f.writelines(iter_result_report(round_correct, round_total, wrong))
+		f.write(tail)
+	return path
+
+
+@st.fragment
+def render_question():
+	"""Frage/Antwort-Schleife als Fragment.
+
+	Absenden und Blättern laufen über Callbacks und führen nur dieses
+	Fragment erneut aus; die ganze Seite wird erst zum Rundenende neu aufgebaut.
+	"""
+	idx = st.session_state.index
+	# reset answered flag when question changes
+	if "answered" not in st.session_state:
+		st.session_state.answered = False
+	question = st.session_state.questions[idx]
+	if st.session_state.mode == "Bezeichnung → Bedeutung":
+		prompt, solution = question
+	else:
+		solution, prompt = question
+
+	st.markdown(f"### Frage {idx+1} / {len(st.session_state.questions)}")
+	st.markdown(f"**{prompt}**")
+	# Aussprache: vorwärts direkt zur Frage, rückwärts erst nach dem Antworten (sonst verrät sie die Lösung)
+	cue = st.session_state.get("deck_audio", {}).get(st.session_state.question_ids[idx])
+	if cue and (st.session_state.mode == "Bezeichnung → Bedeutung" or st.session_state.get("answered", False)):
+		clip = audio_clip_bytes(*cue)
+		if clip is not None:
+			data, mime = clip
+			st.audio(data, format=mime)
+	# Zeitpunkt der Anzeige für die Antwortzeit merken
+	if st.session_state.get("shown_at") is None:
+		st.session_state.shown_at = time.monotonic()
+
+	# Eingabefeld: sofort sichtbar; nach Absenden automatisch zur nächsten Frage
+	input_key = f"input_{idx}"
+	answered = st.session_state.get("answered", False)
+	with st.form(key=f"form_{idx}"):
+		# disable inputs once the question has been answered
+		st.text_area("Deine Antwort",
+			key=input_key,
+			disabled=answered)
+		st.form_submit_button("Absenden",
+			disabled=answered,
+			on_click=_submit_answer,
+			args=(input_key, prompt, solution))
+		if answered and not last_answer_correct(st.session_state.answer_log):
+			st.error("Nicht korrekt.")
+			st.info(f"Richtige Antwort: {solution}")
+	cols = st.columns(3)
+	cols[0].button("Zurück", on_click=_step_question, args=(-1,))
+	cols[1].button("Nächste Frage", on_click=_step_question, args=(1,))
+	if cols[2].button("Beenden und Ergebnis anzeigen"):
+		st.session_state.index = len(st.session_state.questions) - 1
+		st.session_state.show_summary = True
+		persist_session()
+		st.rerun()
+
+	st.markdown("---")
+	log = st.session_state.answer_log
+	st.write(f"Punkte: {log['correct']} / {log['total']}")
+
+	# Runde fertig: ganze Seite neu aufbauen, damit das Ergebnis angeboten wird
+	if st.session_state.pop("finish_rerun", False) and not st.session_state.get("show_summary", False):
+		st.rerun()
+
+
 def main():
 	st.title("Memorytraining")
 	st.subheader("Bezeichnung <-> Bedeutung")
@@ -362,44 +2284,59 @@ def main():
 	# Datei-Uploader in die linke Seitenleiste setzen (vertikal)
 	uploaded = st.sidebar.file_uploader("Lade eine .xlsx-Datei hoch (Spalten: Bezeichnung, Bedeutung)", type=["xlsx"])
 
-	df = None
-	# Priorität: Upload > feste Standard-Datei
+	deck = None
+	# Priorität: Upload > Deck-Bibliothek (Standard: feste Standard-Datei)
 	if uploaded is not None:
+		try:
+			library = [upload_deck_metadata(uploaded)]
+		except Exception as e:
+			st.error(f"Fehler beim Lesen der Datei: {e}")
+			return
+		default_name = library[0]["name"]
+	else:
+		if os.path.exists(DEFAULT_XLSX_PATH):
+			start_deck_watcher(DEFAULT_XLSX_PATH)
+		library = scan_deck_library()
+		default_name = os.path.splitext(os.path.basename(DEFAULT_XLSX_PATH))[0]
+	options = deck_sheet_options(library)
+	if uploaded is not None and not options:
+		# keine passende Kopfzeile gefunden -> Fehlermeldung aus load_dataframe
 		df = load_dataframe(uploaded)
-	elif os.path.exists(DEFAULT_XLSX_PATH):
-		st.sidebar.info(f"Lade Standarddatei: {DEFAULT_XLSX_PATH}")
-		df = load_dataframe(DEFAULT_XLSX_PATH)
+		if df is not None:
+			deck = new_deck(df)
+	elif options:
+		defaults = [label for label, (meta, _sh) in options.items() if meta["name"] == default_name]
+		selected = st.sidebar.multiselect(
+			"Decks",
+			list(options),
+			default=defaults or list(options)[:1],
+			format_func=lambda label: f"{label} ({options[label][1]['rows']})",
+		)
+		if not selected:
+			st.info("Bitte mindestens ein Deck auswählen.")
+			return
+		deck = combine_decks([(options[label][0], options[label][1]["title"]) for label in selected])
 	else:
 		st.info("Bitte zuerst eine Excel-Datei hochladen oder die Standarddatei anlegen.")
 		return
 
-	if df is None:
+	if deck is None:
 		return
+	df = deck["df"]
+	# Audio-Pfade der Karten für das Frage-Fragment
+	st.session_state.deck_audio = deck_audio_cues(df)
 
 	st.sidebar.header("Einstellungen")
 	mode = st.sidebar.selectbox("Richtung", ["Bezeichnung → Bedeutung", "Bedeutung → Bezeichnung"])
 	shuffle = st.sidebar.checkbox("Zufällige Reihenfolge", value=True)
 	auto_restart = st.sidebar.checkbox("Automatisch neu starten nach Durchlauf", value=True)
 	debug_output = st.sidebar.checkbox("Debug anzeigen (Antworten/Offsets)", value=False)
+	quiz_type = st.sidebar.radio("Abfrage", ["Einzelfragen", "Prüfungsmodus"])
 	max_q = st.sidebar.number_input("Anzahl Fragen (0 = alle)", min_value=0, max_value=len(df), value=0)
 
 	# Fehlerstatistik anzeigen
-	st.sidebar.markdown("---")
-	st.sidebar.header("📊 Fehlerstatistik")
-	stats_df = get_stats_dataframe()
-	if stats_df is not None and len(stats_df) > 0:
-		st.sidebar.write(f"Gesamt erfasste Fehler: {stats_df['Fehler'].sum()}")
-		with st.sidebar.expander("Top 25 häufigste Fehler"):
-			# Hinweis: `use_container_width` wurde ersetzt durch `width`.
-			# Für volle Breite benutze `width='stretch'`.
-			st.dataframe(stats_df.head(25), width='stretch')
-		if st.sidebar.button("🗑️ Statistik zurücksetzen"):
-			if os.path.exists(STATS_FILE):
-				os.remove(STATS_FILE)
-				st.sidebar.success("Statistik gelöscht!")
-				st.rerun()
-	else:
-		st.sidebar.info("Noch keine Fehler erfasst.")
+	with st.sidebar:
+		render_stats_sidebar()
 	
 	# Fortschrittsdaten zurücksetzen
 	st.sidebar.markdown("---")
@@ -419,106 +2356,53 @@ def main():
 
 	n_questions = len(df) if max_q == 0 else int(max_q)
 
+	if quiz_type == "Prüfungsmodus":
+		run_exam(df, deck["index"], mode, n_questions, shuffle)
+		return
+
 	if "questions" not in st.session_state:
 		st.session_state.questions = []
+		# neue Sitzung: ggf. unterbrochene Runde aus dem Snapshot fortsetzen
+		if resume_session(df, ensure_session_token()):
+			st.info("Unterbrochene Runde wurde fortgesetzt.")
+	else:
+		ensure_session_token()
 
 	if st.button("Quiz starten"):
 		start_quiz(df, mode, n_questions, shuffle)
 
 	if st.session_state.questions:
-		idx = st.session_state.index
-		# reset answered flag when question changes
-		if "answered" not in st.session_state:
-			st.session_state.answered = False
-		question = st.session_state.questions[idx]
-		if st.session_state.mode == "Bezeichnung → Bedeutung":
-			prompt, solution = question
-		else:
-			solution, prompt = question
-
-		st.markdown(f"### Frage {idx+1} / {len(st.session_state.questions)}")
-		st.markdown(f"**{prompt}**")
-
-		# Eingabefeld: sofort sichtbar; nach Absenden automatisch zur nächsten Frage
-		input_key = f"input_{idx}"
-		with st.form(key=f"form_{idx}"):
-			# disable inputs once the question has been answered
-			user_input = st.text_area("Deine Antwort",
-				key=input_key,
-				disabled=st.session_state.get("answered", False))
-			submitted = st.form_submit_button("Absenden",
-				disabled=st.session_state.get("answered", False))
-			if submitted and not st.session_state.get("answered", False):
-				correct = check_answer(user_input, solution)
-				st.session_state.answers.append((prompt, solution, user_input, correct))
-				st.session_state.answered = True
-				if correct:
-					st.session_state.score += 1
-					st.success("Richtig!")
-					# advance automatically on correct answer
-					if st.session_state.index < len(st.session_state.questions) - 1:
-						st.session_state.index += 1
-						st.session_state.answered = False
-						st.rerun()
-					else:
-						st.session_state.finished_round = True
-						st.rerun()
-				else:
-					# Fehlerstatistik aktualisieren
-					update_error_stats(prompt, solution)
-					st.error("Nicht korrekt.")
-					st.info(f"Richtige Antwort: {solution}")
-		cols = st.columns(3)
-		if cols[0].button("Zurück"):
-			if st.session_state.index > 0:
-				st.session_state.index -= 1
-				st.session_state.answered = False
-				st.rerun()
-		if cols[1].button("Nächste Frage"):
-			if st.session_state.index < len(st.session_state.questions) - 1:
-				st.session_state.index += 1
-				st.session_state.answered = False
-				st.rerun()
-		if cols[2].button("Beenden und Ergebnis anzeigen"):
-			st.session_state.index = len(st.session_state.questions) - 1
-			st.session_state.show_summary = True
-			st.rerun()
-
-		st.markdown("---")
-		st.write(f"Punkte: {st.session_state.score} / {len(st.session_state.answers)}")
-
-		# prepare recent-round stats so we can show them in a popup
-		recent = st.session_state.answers[st.session_state.round_offset:]
-		round_total = len(recent)
-		round_correct = sum(1 for (_p, _s, _u, c) in recent if c)
-		wrong = [(p, s, u) for (p, s, u, c) in recent if not c]
+		render_question()
 
 		# Wenn alle Fragen beantwortet sind: Button anbieten, um das Ergebnis anzuzeigen (keine automatische Anzeige)
-		# Falls alle Antworten bereits vorhanden sind (z.B. durch manuelles Setzen), markiere die Runde als fertig
-		if (len(st.session_state.answers) - st.session_state.round_offset) == len(st.session_state.questions) and not st.session_state.get("show_summary", False) and not st.session_state.get("finished_round", False):
-			st.session_state.finished_round = True
-			st.rerun()
+		# (das Fragment markiert die Runde als fertig und baut dann die ganze Seite neu auf)
 		if st.session_state.get("finished_round", False) and not st.session_state.get("show_summary", False):
 			st.info("Alle Fragen wurden beantwortet. Klicke auf 'Ergebnis anzeigen', um die Ergebnisse zu sehen.")
 			if st.button("Ergebnis anzeigen"):
-				# build HTML for popup
-				if round_total == 0:
-					popup_body = '<p>Keine Ergebnisse vorhanden.</p>'
-				else:
-					rows = ''
-					for p, s, u in wrong:
-						rows += f"<tr><td>{html_lib.escape(str(p))}</td><td>{html_lib.escape(str(s))}</td><td>{html_lib.escape(str(u))}</td></tr>"
-					if rows:
-						wrong_table = f"<h2>Falsche Antworten</h2><table border='1' style='border-collapse:collapse; width:100%'><thead><tr><th>Prompt</th><th>Lösung</th><th>Deine Antwort</th></tr></thead><tbody>{rows}</tbody></table>"
-					else:
-						wrong_table = '<p>Keine falschen Antworten in dieser Runde.</p>'
-					popup_body = f"<p>Richtige Antworten (diese Runde): <strong>{round_correct}</strong> / {round_total}</p>{wrong_table}"
-				popup_html = f"<html><head><meta charset='utf-8'><title>Ergebnis</title><style>body{{font-family:Arial,Helvetica,sans-serif;padding:16px}}table th,table td{{padding:8px;text-align:left}}</style></head><body><h1>Ergebnis</h1>{popup_body}</body></html>"
+				# prepare recent-round stats for the popup
+				log = st.session_state.answer_log
+				round_total = log["round_total"]
+				round_correct = log["round_correct"]
+				wrong = round_wrong_answers(log, st.session_state.questions)
+				# lange Runden: vollständigen Bericht als Download, im Popup nur die erste Seite
+				report_path = None
+				if len(wrong) > RESULT_PAGE_SIZE:
+					report_path = save_result_report(round_correct, round_total, wrong)
+				st.session_state.report_path = report_path
+				popup_html = render_result_report(round_correct, round_total, wrong, pages=1,
+					report_name=os.path.basename(report_path) if report_path else None)
 				# open popup via JS and write the HTML
 				components.html(f"<script>var w=window.open('','_blank','toolbar=0,location=0,status=0,menubar=0,width=900,height=700'); w.document.write({json.dumps(popup_html)}); w.document.close();</script>", height=1)
 				st.session_state.finished_round = False
+				persist_session()
 				st.rerun()
-				st.rerun()
+
+		# vollständiger Bericht der letzten Runde (liegt auf dem Server, daher als Download)
+		report_path = st.session_state.get("report_path")
+		if report_path and os.path.exists(report_path):
+			with open(report_path, 'rb') as f:
+				st.download_button("📄 Vollständigen Bericht herunterladen", f.read(),
+					file_name=os.path.basename(report_path), mime="text/html")
 
 		# Only show summary when explicitly requested (show_summary True)
 		if st.session_state.get("show_summary", False):
@@ -547,22 +2431,20 @@ def main():
 			  }, 50);
 			</script>
 			""", height=1)
-			# compute round results using the stored correctness flag
-			recent = st.session_state.answers[st.session_state.round_offset:]
-			# recent is list of tuples: (prompt, solution, user_input, is_correct)
-			round_total = len(recent)
-			round_correct = sum(1 for (_p, _s, _u, c) in recent if c)
+			# round results come from the running counters of the answer log
+			log = st.session_state.answer_log
+			round_total = log["round_total"]
+			round_correct = log["round_correct"]
 			# (Konfetti entfernt) — keine Animation mehr
-			# cumulative score uses stored booleans as well
-			st.session_state.score = sum(1 for (_p, _s, _u, c) in st.session_state.answers if c)
 			
 			# Fortschrittsdaten speichern (nur einmal pro Runde)
 			if not st.session_state.get("progress_saved", False):
 				add_progress_entry(round_correct, round_total)
 				st.session_state.progress_saved = True
+				persist_session(immediate=True)
 			
 			st.write(f"Richtige Antworten (diese Runde): {round_correct} / {round_total}")
-			st.write(f"Kumulativ: {st.session_state.score} / {len(st.session_state.answers)}")
+			st.write(f"Kumulativ: {log['correct']} / {log['total']}")
 			
 			# Lernfortschrittsdiagramm anzeigen
 			st.markdown("---")
@@ -573,10 +2455,17 @@ def main():
 				st.plotly_chart(progress_fig, width='stretch')
 			else:
 				st.info("Noch keine Fortschrittsdaten vorhanden.")
+			# Ereignisse dieser Runde zuerst schreiben (einmal pro Runde), damit sie im Diagramm erscheinen
+			if not st.session_state.get("events_flushed", False):
+				flush_answer_events()
+				st.session_state.events_flushed = True
+			accuracy_fig = plot_card_accuracy(df)
+			if accuracy_fig:
+				st.plotly_chart(accuracy_fig, width='stretch')
 			# Pie chart (single, with explicit color mapping: Grün = Richtig, Rot = Falsch)
 			# (Tortendiagramm entfernt — nur Tabelle der falschen Antworten wird angezeigt)
 			# show incorrect answers (if any) - only this table
-			wrong = [(p, s, u) for (p, s, u, c) in recent if not c]
+			wrong = round_wrong_answers(log, st.session_state.questions)
 			# (chart already rendered above)
 			if wrong:
 				st.subheader("Falsche Antworten")
@@ -586,12 +2475,12 @@ def main():
 				if debug_output:
 					with st.expander("Debug: interne Listen anzeigen"):
 						st.write({
-							"session_answers_count": len(st.session_state.answers),
-							"round_offset": st.session_state.round_offset,
-							"recent_count": len(recent),
+							"session_answers_count": log["total"],
+							"session_correct": log["correct"],
+							"round_count": log["round_total"],
 							"wrong_count": len(wrong),
-							"session_answers": st.session_state.answers,
-							"recent": recent,
+							"round_cards": [f"{c:016x}" for c in log["cards"]],
+							"round_flags": bytes(log["flags"]).hex(),
 							"wrong": wrong,
 						})
 			else:
@@ -599,8 +2488,11 @@ def main():
 			# (No overview of correct answers is shown per user preference.)
 			# Falls Auto-Restart gewünscht: Button anbieten, damit Zusammenfassung erhalten bleibt
 			if auto_restart:
+				# nächste Runde schon ziehen, während die Zusammenfassung angezeigt wird
+				prefetch_next_round(deck, n_questions, shuffle)
 				if st.button("Nächste Runde starten (neu mischen)"):
-					start_quiz(df, mode, n_questions, shuffle=shuffle, reset_score=False)
+					rows = take_next_round(deck, n_questions, shuffle)
+					start_quiz(df, mode, n_questions, shuffle=shuffle, reset_score=False, rows=rows)
 					st.rerun()
 
 
@@ -4,10 +4,12 @@ import random
 import re
 import os
 import json
+import shutil
 import html as html_lib
 import streamlit.components.v1 as components
 import plotly.graph_objects as go
 from datetime import datetime
+import Memorytraining_codec as codec
 
 # Pfad zur festen Excel-Datei (ändere hier bei Bedarf)
 # Aktuell nutzt die Datei im gleichen Ordner wie dieses Skript: 'sample_memory.xlsx'
@@ -29,21 +31,37 @@ def normalize(s: str) -> str:
 	return s
 
 
+def load_state(path, schema, default):
+	"""Lädt eine JSON-Datei über den Codec; fehlt sie, kommt default zurück.
+
+	Ist sie ungültig, wird sie als <path>.defekt-<Zeit> beiseitegelegt,
+	damit das nächste Speichern sie nicht überschreibt.
+	"""
+	try:
+		with open(path, 'rb') as f:
+			return codec.decode(f.read(), schema)
+	except FileNotFoundError:
+		return default
+	except ValueError as e:
+		backup = f"{path}.defekt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+		shutil.copyfile(path, backup)
+		print(f"⚠️ {path} ist beschädigt ({e}), Kopie unter {backup}; starte mit leerem Stand.")
+		return default
+
+
+def save_state(path, data):
+	"""Schreibt kompaktes JSON atomar (eindeutige temporäre Datei, dann umbenennen)."""
+	codec.atomic_write(path, codec.encode(data))
+
+
 def load_stats():
 	"""Lädt die Fehlerstatistik aus der JSON-Datei."""
-	if os.path.exists(STATS_FILE):
-		try:
-			with open(STATS_FILE, 'r', encoding='utf-8') as f:
-				return json.load(f)
-		except:
-			return {}
-	return {}
+	return load_state(STATS_FILE, codec.STATS, {})
 
 
 def save_stats(stats):
 	"""Speichert die Fehlerstatistik in der JSON-Datei."""
-	with open(STATS_FILE, 'w', encoding='utf-8') as f:
-		json.dump(stats, f, ensure_ascii=False, indent=2)
+	save_state(STATS_FILE, stats)
 
 
 def update_error_stats(prompt, solution):
@@ -66,19 +84,12 @@ def get_stats_dataframe():
 
 def load_progress():
 	"""Lädt die Fortschrittsdaten aus der JSON-Datei."""
-	if os.path.exists(PROGRESS_FILE):
-		try:
-			with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
-				return json.load(f)
-		except:
-			return []
-	return []
+	return load_state(PROGRESS_FILE, codec.PROGRESS, [])
 
 
 def save_progress(progress_data):
 	"""Speichert die Fortschrittsdaten in der JSON-Datei."""
-	with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-		json.dump(progress_data, f, ensure_ascii=False, indent=2)
+	save_state(PROGRESS_FILE, progress_data)
 
 
 def add_progress_entry(correct, total):
@@ -0,0 +1,216 @@
+"""REST/JSON-API für das Memorytraining.
+
+Stellt die Quiz-Logik aus `Memorytraining.py` als kleinen ASGI-Dienst bereit,
+damit Abfragen auch aus anderen Tools heraus genutzt werden können.
+
+Starten:
+
+	uvicorn Memorytraining_api:app --port 8000
+
+Endpunkte:
+	GET  /deck              geladene Decks auflisten
+	POST /deck              .xlsx-Datei (Request-Body) als neues Deck laden
+	GET  /next?n=&deck=&mode=&shuffle=   nächste Fragen ziehen
+	POST /answer            {"deck", "card", "mode", "answer"} prüfen
+	GET  /progress          gespeicherte Runden aus Supabase
+	POST /progress          {"correct", "total"} als Runde speichern
+"""
+import asyncio
+import io
+import math
+import os
+import threading
+import uuid
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import Memorytraining as mt
+
+# Richtungen wie in der App; per Query-Parameter als Kurzform wählbar
+MODES = {
+	"forward": "Bezeichnung → Bedeutung",
+	"backward": "Bedeutung → Bezeichnung",
+}
+
+# Im Speicher gehaltene Decks: deck_id -> {"df", "pairs", "index"}
+DECKS = {}
+DECKS_LOCK = threading.Lock()
+
+# memory_stats.json wird per read-modify-write aktualisiert -> serialisieren
+STATS_LOCK = threading.Lock()
+
+# Abstand (Sekunden), in dem gepufferte Antwort-Ereignisse geschrieben werden
+EVENT_FLUSH_SECONDS = 30
+
+# Supabase-Client (ein Prozess-Singleton, ohne st.secrets/st.stop)
+SUPABASE = None
+SUPABASE_LOCK = threading.Lock()
+
+
+def _register_deck(deck_id, df):
+	"""Legt ein geladenes DataFrame als Deck im Speicher ab."""
+	pairs = list(df[["Bezeichnung", "Bedeutung"]].itertuples(index=False, name=None))
+	deck = {"df": df, "pairs": pairs, "index": mt.build_deck_index(df)}
+	with DECKS_LOCK:
+		DECKS[deck_id] = deck
+	return deck
+
+
+def get_deck(deck_id):
+	"""Liefert ein Deck; das Standard-Deck wird beim ersten Zugriff geladen."""
+	deck = DECKS.get(deck_id)
+	if deck is None and deck_id == "default" and os.path.exists(mt.DEFAULT_XLSX_PATH):
+		df = mt.load_dataframe(mt.DEFAULT_XLSX_PATH, verbose=False)
+		if df is not None:
+			deck = _register_deck("default", df)
+	return deck
+
+
+def get_supabase():
+	"""Supabase-Client aus Umgebung bzw. secrets.toml; wirft bei Fehlern (-> 5xx)."""
+	global SUPABASE
+	with SUPABASE_LOCK:
+		if SUPABASE is None:
+			SUPABASE = mt.connect_supabase(*mt.read_supabase_credentials())
+		return SUPABASE
+
+
+def _error(message, status_code=400):
+	return JSONResponse({"error": message}, status_code=status_code)
+
+
+def _text(value):
+	# leere Zellen (NaN) sind kein gültiges JSON
+	return "" if isinstance(value, float) and math.isnan(value) else value
+
+
+async def deck_endpoint(request):
+	if request.method == "GET":
+		return JSONResponse({
+			"decks": [{"deck": deck_id, "cards": len(deck["pairs"])} for deck_id, deck in DECKS.items()]
+		})
+	body = await request.body()
+	if not body:
+		return _error("Leerer Request-Body, erwartet wird eine .xlsx-Datei.")
+	df = await run_in_threadpool(mt.load_dataframe, io.BytesIO(body), None, False)
+	if df is None:
+		return _error("Die Excel-Datei muss die Spalten 'Bezeichnung' und 'Bedeutung' enthalten.")
+	deck_id = request.query_params.get("deck") or uuid.uuid4().hex[:12]
+	deck = _register_deck(deck_id, df)
+	return JSONResponse({"deck": deck_id, "cards": len(deck["pairs"])}, status_code=201)
+
+
+async def next_endpoint(request):
+	params = request.query_params
+	deck_id = params.get("deck", "default")
+	deck = await run_in_threadpool(get_deck, deck_id)
+	if deck is None:
+		return _error(f"Deck '{deck_id}' nicht gefunden.", 404)
+	mode = params.get("mode", "forward")
+	if mode not in MODES:
+		return _error(f"Unbekannte Richtung '{mode}', erlaubt: {', '.join(MODES)}")
+	try:
+		n = int(params.get("n", 1))
+	except ValueError:
+		return _error("Parameter 'n' muss eine Zahl sein.")
+	if n < 1:
+		return _error("Parameter 'n' muss mindestens 1 sein.")
+	shuffle = params.get("shuffle", "1").lower() not in ("0", "false", "no")
+
+	def sample():
+		with STATS_LOCK:
+			stats = mt.load_stats()
+		return mt.sample_question_rows(deck["df"], n, shuffle=shuffle, stats=stats)
+
+	rows = await run_in_threadpool(sample)
+	ids = deck["df"]["ID"]
+	side = 0 if mode == "forward" else 1
+	questions = [{"card": ids.iat[row], "prompt": _text(deck["pairs"][row][side])} for row in rows]
+	return JSONResponse({"deck": deck_id, "mode": mode, "questions": questions})
+
+
+async def answer_endpoint(request):
+	try:
+		payload = await request.json()
+		deck_id = payload.get("deck", "default")
+		card = str(payload["card"])
+		mode = payload.get("mode", "forward")
+		user_ans = payload.get("answer", "")
+	except (ValueError, KeyError, TypeError, AttributeError):
+		return _error("Erwartet wird JSON mit 'card' und 'answer'.")
+	if mode not in MODES:
+		return _error(f"Unbekannte Richtung '{mode}', erlaubt: {', '.join(MODES)}")
+	deck = await run_in_threadpool(get_deck, deck_id)
+	if deck is None:
+		return _error(f"Deck '{deck_id}' nicht gefunden.", 404)
+	row = deck["index"]["by_id"].get(card)
+	if row is None:
+		return _error(f"Karte {card} existiert nicht.", 404)
+	if mode == "forward":
+		prompt, solution = deck["pairs"][row]
+	else:
+		solution, prompt = deck["pairs"][row]
+	correct = mt.check_answer(user_ans, solution)
+	# kann bei EVENT_FLUSH_ROWS Parquet schreiben -> nicht auf dem Event-Loop
+	await run_in_threadpool(mt.record_answer_event, card, mode == "backward", correct)
+	if not correct:
+		def record_error():
+			with STATS_LOCK:
+				mt.update_error_stats(prompt, solution)
+		await run_in_threadpool(record_error)
+	return JSONResponse({"correct": correct, "solution": _text(solution)})
+
+
+async def progress_endpoint(request):
+	if request.method == "GET":
+		try:
+			progress = await run_in_threadpool(lambda: mt.fetch_progress(get_supabase()))
+		except Exception as e:
+			return _error(f"Fortschritt konnte nicht geladen werden: {e}", 502)
+		return JSONResponse({"progress": progress})
+	try:
+		payload = await request.json()
+		correct = int(payload["correct"])
+		total = int(payload["total"])
+	except (ValueError, KeyError, TypeError):
+		return _error("Erwartet wird JSON mit 'correct' und 'total'.")
+	# Der Supabase-Client ist ein Prozess-Singleton;
+	# sein HTTP-Connection-Pool wird so von allen Requests geteilt.
+	try:
+		await run_in_threadpool(lambda: mt.insert_progress_entry(get_supabase(), correct, total))
+	except Exception as e:
+		return _error(f"Runde konnte nicht gespeichert werden: {e}", 502)
+	return JSONResponse({"correct": correct, "total": total}, status_code=201)
+
+
+async def flush_events_periodically():
+	"""Schreibt gepufferte Antwort-Ereignisse alle EVENT_FLUSH_SECONDS (die API kennt kein Rundenende)."""
+	while True:
+		await asyncio.sleep(EVENT_FLUSH_SECONDS)
+		await run_in_threadpool(mt.flush_answer_events)
+
+
+@asynccontextmanager
+async def lifespan(app):
+	flusher = asyncio.create_task(flush_events_periodically())
+	yield
+	flusher.cancel()
+	# Rest beim Beenden schreiben
+	await run_in_threadpool(mt.flush_answer_events)
+
+
+app = Starlette(lifespan=lifespan, routes=[
+	Route("/deck", deck_endpoint, methods=["GET", "POST"]),
+	Route("/next", next_endpoint, methods=["GET"]),
+	Route("/answer", answer_endpoint, methods=["POST"]),
+	Route("/progress", progress_endpoint, methods=["GET", "POST"]),
+])
+
+
+if __name__ == "__main__":
+	import uvicorn
+	uvicorn.run(app, host="127.0.0.1", port=int(os.environ.get("PORT", 8000)))
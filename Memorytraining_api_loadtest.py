@@ -0,0 +1,77 @@
+"""Einfacher Lasttest für Memorytraining_api.py auf localhost.
+
+Beispiel (Server vorher mit `uvicorn Memorytraining_api:app` starten):
+
+	python Memorytraining_api_loadtest.py --requests 2000 --concurrency 8
+	python Memorytraining_api_loadtest.py --endpoint answer
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+
+
+def worker(host, port, endpoint, count, latencies, errors):
+	# Eine Keep-Alive-Verbindung pro Thread, wie ein echter Client
+	conn = http.client.HTTPConnection(host, port, timeout=10)
+	# eine gültige Karten-ID für /answer holen
+	conn.request("GET", "/next?n=1&shuffle=0")
+	card = json.loads(conn.getresponse().read())["questions"][0]["card"]
+	body = json.dumps({"card": card, "answer": "lasttest"})
+	for _ in range(count):
+		start = time.perf_counter()
+		try:
+			if endpoint == "answer":
+				conn.request("POST", "/answer", body=body, headers={"Content-Type": "application/json"})
+			else:
+				conn.request("GET", "/next?n=10")
+			response = conn.getresponse()
+			response.read()
+			if response.status >= 400:
+				errors.append(response.status)
+		except (OSError, http.client.HTTPException) as e:
+			errors.append(str(e))
+			conn.close()
+			conn = http.client.HTTPConnection(host, port, timeout=10)
+		latencies.append(time.perf_counter() - start)
+	conn.close()
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Lasttest für die Memorytraining-API")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=8000)
+	parser.add_argument("--requests", type=int, default=1000, help="Anzahl Requests insgesamt")
+	parser.add_argument("--concurrency", type=int, default=4, help="Anzahl paralleler Clients")
+	parser.add_argument("--endpoint", choices=["next", "answer"], default="next")
+	args = parser.parse_args()
+
+	per_worker = max(1, args.requests // args.concurrency)
+	latencies = []
+	errors = []
+	threads = [
+		threading.Thread(target=worker, args=(args.host, args.port, args.endpoint, per_worker, latencies, errors))
+		for _ in range(args.concurrency)
+	]
+	start = time.perf_counter()
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	elapsed = time.perf_counter() - start
+
+	total = len(latencies)
+	print(f"Endpunkt: /{args.endpoint}, Clients: {args.concurrency}")
+	print(f"Requests: {total} in {elapsed:.2f}s -> {total / elapsed:.1f} req/s")
+	if latencies:
+		ordered = sorted(latencies)
+		p95 = ordered[int(len(ordered) * 0.95) - 1]
+		print(f"Latenz: median {statistics.median(ordered) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms")
+	if errors:
+		print(f"Fehler: {len(errors)} (z.B. {errors[0]})")
+
+
+if __name__ == "__main__":
+	main()
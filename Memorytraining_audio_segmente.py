@@ -0,0 +1,97 @@
+"""Schneidet Audio-Clips für alle Karten eines Decks vorab in den Audio-Cache.
+
+Das Deck braucht die Spalten Audio (Pfad zur Quelldatei relativ zum Ordner
+des Decks, z.B. von Youtube_to_MP3.py) sowie Start und/oder Ende
+(Sekunden, "m:ss" oder "h:mm:ss"). Jeder Ausschnitt wird per ffmpeg
+bevorzugt ohne Neukodierung (Stream-Copy) geschnitten; nur wenn das
+scheitert, wird nach AAC kodiert. Mit --normalisieren werden die
+Ausschnitte stattdessen wie ganze Dateien aufbereitet (Stille entfernen,
+Lautheit normalisieren, AAC), was immer eine Neukodierung bedeutet.
+Die Schnitte laufen parallel in einem Prozess-Pool; vorhandene Clips im
+Cache werden übersprungen. Die App findet die Clips anschließend über
+denselben Inhalts-Schlüssel.
+
+Beispiel:
+
+	python Memorytraining_audio_segmente.py sample_memory.xlsx --workers 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import Memorytraining as mt
+
+
+def collect_jobs(df):
+	"""Eindeutige (Quelle, Start, Ende) aller Karten mit Cue; fehlende Quellen werden gemeldet."""
+	jobs = {}
+	missing = set()
+	for path, start, end in mt.deck_audio_cues(df).values():
+		if start is None and end is None:
+			continue
+		if not os.path.exists(path):
+			missing.add(path)
+			continue
+		jobs[(path, start, end)] = None
+	return list(jobs), sorted(missing)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Audio-Ausschnitte eines Decks in den Cache schneiden")
+	parser.add_argument("deck", nargs="?", default=mt.DEFAULT_XLSX_PATH, help="Deck (.xlsx)")
+	parser.add_argument("--sheet", help="Blatt der Arbeitsmappe (Standard: erstes)")
+	parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="parallele ffmpeg-Prozesse")
+	parser.add_argument("--normalisieren", action="store_true",
+		help="Stille entfernen und Lautheit normalisieren (neu kodieren statt Stream-Copy)")
+	args = parser.parse_args()
+
+	ffmpeg = shutil.which("ffmpeg")
+	if ffmpeg is None:
+		sys.exit("❌ ffmpeg wurde nicht gefunden.")
+	df = mt.load_dataframe(os.path.abspath(args.deck), sheet=args.sheet, verbose=False)
+	if df is None:
+		sys.exit(1)
+	jobs, missing = collect_jobs(df)
+	for path in missing:
+		print(f"⚠️ Quelle fehlt: {path}")
+
+	start_time = time.perf_counter()
+	todo = []
+	existing = 0
+	for path, start, end in jobs:
+		# Inhalts-Hash der Quelle im Hauptprozess (einmal pro Datei)
+		if mt.find_segment(path, start, end, args.normalisieren) is not None:
+			existing += 1
+		else:
+			todo.append((path, start, end, mt.segment_base(path, start, end, args.normalisieren)))
+
+	copied = encoded = failed = 0
+	with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+		futures = {
+			pool.submit(mt.cut_segment, path, start, end, base, ffmpeg, args.normalisieren): path
+			for path, start, end, base in todo
+		}
+		for future in as_completed(futures):
+			try:
+				_clip, was_copied = future.result()
+			except Exception as e:
+				failed += 1
+				print(f"❌ {futures[future]}: {e}")
+				continue
+			if was_copied:
+				copied += 1
+			else:
+				encoded += 1
+	elapsed = time.perf_counter() - start_time
+	done = copied + encoded
+	print(f"{done} Clips in {elapsed:.2f}s ({done / elapsed if elapsed else 0:.1f} Clips/s): "
+		f"{copied} kopiert, {encoded} neu kodiert, {existing} bereits im Cache, {failed} Fehler")
+	if failed:
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,217 @@
+"""JSON-Codec für die lokalen Zustandsdateien des Memorytrainings.
+
+Nimmt msgspec oder orjson, wenn installiert, sonst das json-Modul der
+Standardbibliothek. Alle Backends schreiben kompaktes UTF-8 (ohne
+Einrückung, Umlaute unverändert) und lesen die Dateien der anderen.
+Beim Lesen prüft ein Schema die Struktur; msgspec validiert dabei direkt
+beim Dekodieren, die anderen Backends prüfen anschließend in Python.
+atomic_write schreibt die kodierten Dateien absturzsicher.
+
+Backend erzwingen (z.B. zum Vergleichen):
+
+	MEMORYTRAINING_JSON=json streamlit run Memorytraining.py
+"""
+import json
+import os
+import uuid
+from typing import TypedDict
+
+try:
+	import msgspec
+except ImportError:  # optional
+	msgspec = None
+
+try:
+	import orjson
+except ImportError:  # optional
+	orjson = None
+
+
+class SchemaError(ValueError):
+	"""Die Datei ist gültiges JSON, passt aber nicht zum erwarteten Schema."""
+
+
+class TombstoneEntry(TypedDict):
+	Bezeichnung: str
+	Bedeutung: str
+	forward: int
+	backward: int
+	removed: str
+
+
+class ProgressEntry(TypedDict):
+	timestamp: str
+	correct: int
+	total: int
+	percentage: float
+
+
+def _is_int(value):
+	# bool ist in Python ein int, in der Statistik aber ein Fehler
+	return type(value) is int
+
+
+def _check_fields(entry, fields):
+	if not isinstance(entry, dict):
+		return False
+	for name, kind in fields.items():
+		value = entry.get(name)
+		if kind is int:
+			if not _is_int(value):
+				return False
+		elif kind is float:
+			if not (_is_int(value) or type(value) is float):
+				return False
+		elif not isinstance(value, kind):
+			return False
+	return True
+
+
+class Schema:
+	"""Erwartete Struktur einer Zustandsdatei: Typ für msgspec, Prüffunktion für die übrigen Backends."""
+
+	def __init__(self, name, type_, check):
+		self.name = name
+		self.type = type_
+		self.check = check
+
+	def validate(self, data):
+		if not self.check(data):
+			raise SchemaError(f"{self.name}: unerwartete Struktur")
+		return data
+
+
+def _check_stats(data):
+	return isinstance(data, dict) and set(map(type, data.values())) <= {int}
+
+
+def _check_tombstones(data):
+	fields = TombstoneEntry.__annotations__
+	return isinstance(data, dict) and all(_check_fields(entry, fields) for entry in data.values())
+
+
+def _check_progress(data):
+	fields = ProgressEntry.__annotations__
+	return isinstance(data, list) and all(_check_fields(entry, fields) for entry in data)
+
+
+# Fehlerstatistik: "Frage → Antwort" -> Anzahl Fehler
+STATS = Schema("Fehlerstatistik", dict[str, int], _check_stats)
+# Statistik entfernter Karten: Karten-ID -> Eintrag
+TOMBSTONES = Schema("Tombstones", dict[str, TombstoneEntry], _check_tombstones)
+# Fortschrittsdatei der alten lokalen Version: Liste von Runden
+PROGRESS = Schema("Fortschritt", list[ProgressEntry], _check_progress)
+
+
+class JsonCodec:
+	"""Standardbibliothek; immer verfügbar."""
+
+	name = "json"
+
+	def encode(self, data):
+		return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+	def decode(self, raw, schema=None):
+		data = json.loads(raw)
+		return schema.validate(data) if schema is not None else data
+
+
+class OrjsonCodec(JsonCodec):
+	name = "orjson"
+
+	def encode(self, data):
+		return orjson.dumps(data)
+
+	def decode(self, raw, schema=None):
+		# orjson.JSONDecodeError ist ein ValueError
+		data = orjson.loads(raw)
+		return schema.validate(data) if schema is not None else data
+
+
+class MsgspecCodec(JsonCodec):
+	name = "msgspec"
+
+	def __init__(self):
+		self.encoder = msgspec.json.Encoder()
+		self.decoders = {}
+
+	def encode(self, data):
+		return self.encoder.encode(data)
+
+	def decode(self, raw, schema=None):
+		if schema is None:
+			decoder = self.decoders.get(None)
+			if decoder is None:
+				decoder = self.decoders[None] = msgspec.json.Decoder()
+		else:
+			decoder = self.decoders.get(schema.name)
+			if decoder is None:
+				decoder = self.decoders[schema.name] = msgspec.json.Decoder(schema.type)
+		try:
+			return decoder.decode(raw)
+		except msgspec.ValidationError as e:
+			raise SchemaError(f"{schema.name}: {e}") from e
+		except msgspec.DecodeError as e:
+			raise ValueError(str(e)) from e
+
+
+def available_codecs():
+	"""Namen der installierten Backends, schnellstes zuerst."""
+	names = []
+	if msgspec is not None:
+		names.append("msgspec")
+	if orjson is not None:
+		names.append("orjson")
+	names.append("json")
+	return names
+
+
+def get_codec(name=None):
+	"""Codec nach Name; ohne Name MEMORYTRAINING_JSON oder das schnellste installierte Backend."""
+	name = name or os.environ.get("MEMORYTRAINING_JSON") or available_codecs()[0]
+	if name not in available_codecs():
+		raise ValueError(f"JSON-Backend '{name}' ist nicht installiert (verfügbar: {', '.join(available_codecs())})")
+	if name == "msgspec":
+		return MsgspecCodec()
+	if name == "orjson":
+		return OrjsonCodec()
+	return JsonCodec()
+
+
+codec = get_codec()
+
+
+def atomic_write(path, data):
+	"""Schreibt data (bytes) absturzsicher: temporäre Datei, fsync, dann umbenennen.
+
+	Leser sehen immer entweder die alte oder die neue Datei, nie eine halb geschriebene.
+	"""
+	directory = os.path.dirname(os.path.abspath(path))
+	tmp = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+	try:
+		with open(tmp, 'wb') as f:
+			f.write(data)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp, path)
+	except BaseException:
+		if os.path.exists(tmp):
+			os.remove(tmp)
+		raise
+	if os.name != "nt":
+		# Umbenennung selbst dauerhaft machen (Verzeichniseintrag)
+		fd = os.open(directory, os.O_RDONLY)
+		try:
+			os.fsync(fd)
+		finally:
+			os.close(fd)
+
+
+def encode(data):
+	"""Kompaktes UTF-8-JSON als bytes."""
+	return codec.encode(data)
+
+
+def decode(raw, schema=None):
+	"""Dekodiert bytes und prüft optional gegen ein Schema (SchemaError bei Abweichung)."""
+	return codec.decode(raw, schema)
@@ -0,0 +1,66 @@
+"""Misst Laden und Speichern einer großen Fehlerstatistik mit allen JSON-Backends.
+
+Erzeugt eine synthetische memory_stats.json mit --entries Einträgen in
+einem temporären Verzeichnis und misst je installiertem Backend
+(msgspec, orjson, json) den Speichervorgang wie save_stats()
+(kodieren + atomar schreiben mit fsync) und den Ladevorgang wie
+load_stats() (lesen + dekodieren + Schema prüfen).
+
+Beispiel:
+
+	python Memorytraining_codec_benchmark.py --entries 1000000 --repeat 5
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import Memorytraining_codec as codec
+
+
+def make_stats(entries, seed=0):
+	rng = random.Random(seed)
+	return {f"Frage {i} äöü → Antwort {i}": rng.randint(1, 50) for i in range(entries)}
+
+
+def measure(func, repeat):
+	times = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		func()
+		times.append(time.perf_counter() - start)
+	return statistics.median(times), min(times)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Lade-/Speicherlatenz der Fehlerstatistik je JSON-Backend")
+	parser.add_argument("--entries", type=int, default=1_000_000, help="Anzahl Einträge der Statistik")
+	parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen je Messung")
+	parser.add_argument("--backend", action="append", choices=["msgspec", "orjson", "json"],
+		help="nur diese Backends messen (mehrfach möglich, Standard: alle installierten)")
+	args = parser.parse_args()
+
+	backends = [name for name in codec.available_codecs() if not args.backend or name in args.backend]
+	stats = make_stats(args.entries)
+	print(f"Statistik mit {len(stats)} Einträgen, {args.repeat} Wiederholungen (Median / bestes)")
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "memory_stats.json")
+		for name in backends:
+			backend = codec.get_codec(name)
+			save_median, save_best = measure(lambda: codec.atomic_write(path, backend.encode(stats)), args.repeat)
+
+			def load():
+				with open(path, 'rb') as f:
+					return backend.decode(f.read(), codec.STATS)
+
+			load_median, load_best = measure(load, args.repeat)
+			assert load() == stats
+			size = os.path.getsize(path) / 1e6
+			print(f"{name:8} speichern {save_median * 1000:8.1f} ms / {save_best * 1000:8.1f} ms   "
+				f"laden {load_median * 1000:8.1f} ms / {load_best * 1000:8.1f} ms   {size:.1f} MB")
+
+
+if __name__ == "__main__":
+	main()
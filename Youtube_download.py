@@ -0,0 +1,729 @@
+"""Downloader für YouTube-Audio (Einzel-URL oder Batch) mit Formatprofilen.
+
+Ersetzt die früheren Einzelskripte; Youtube_to_MP3.py und Youtube_to_m4a.py
+rufen nur noch main() mit ihrem Profil auf.
+
+Profile (--profile, Standard mp3-192) legen yt-dlp-Format und Zielformat
+fest, siehe PROFILES. Liefert der Anbieter das Zielformat bereits (z.B. m4a),
+wird ohne ffmpeg-Durchlauf übernommen.
+
+URLs kommen von der Kommandozeile, aus einer Datei (eine URL pro Zeile,
+optional mit vorangestelltem Profil, `#` leitet Kommentare ein) oder mit
+`-i -` von stdin. Alle Profile teilen sich Worker-Pool und Archiv. Die Downloads laufen
+parallel in einem begrenzten Thread-Pool; zusätzlich ist die Anzahl
+gleichzeitiger Downloads pro Host begrenzt. Während des Laufs wird
+regelmäßig ein Gesamtfortschritt (Anzahl, Bytes, Durchsatz) ausgegeben.
+
+Muss konvertiert werden, geschieht das nicht inline (FFmpegExtractAudio):
+fertige Downloads kommen in eine begrenzte Warteschlange, aus
+der ein eigener Pool von ffmpeg-Prozessen (Standard: Anzahl CPUs) liest.
+So laufen Netzwerk und Kodierung gleichzeitig; ist die Warteschlange voll,
+warten die Downloads (Backpressure).
+
+Fertige Dateien werden in einem Archiv (.download_archive.json im
+Zielordner) mit Video-ID, Format, Größe und Hash vermerkt. Vor dem Abruf
+prüft yt-dlp das Archiv; liegt die Datei unverändert vor, wird die URL bzw.
+der Playlist-Eintrag ohne Download übersprungen.
+
+Downloads laufen in .part-Dateien und werden in Blöcken (HTTP-Range,
+--chunk-size) geholt. Ein abgebrochener Lauf setzt beim nächsten Start am
+letzten geschriebenen Byte fort; nach dem Download (vor den
+Postprozessoren) wird die Anzahl empfangener Bytes gegen die gemeldete
+Dateigröße geprüft.
+
+Für jeden Eintrag werden Wartezeit im Pool, Download-, Warte- und
+Konvertierungszeit, Bytes und Durchsatz gemessen (yt-dlp progress_hooks und
+postprocessor_hooks). Während des Laufs zeigt eine Tabelle die aktiven
+Einträge; mit --metrics wird am Ende eine JSON-Zusammenfassung geschrieben.
+
+Beispiele:
+
+    python Youtube_download.py --profile mp3-320 https://youtu.be/EZVFdxvFou4
+    python Youtube_download.py -i liste.txt --workers 6 --per-host 2
+    cat liste.txt | python Youtube_to_m4a.py -i -
+    python Youtube_download.py --profile m4a http://127.0.0.1:8000/test.m4a -o /tmp/out
+
+liste.txt:
+
+    https://youtu.be/EZVFdxvFou4
+    m4a-native https://youtu.be/toRmf2tbcrU
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import yt_dlp
+from yt_dlp.postprocessor import PostProcessor
+from yt_dlp.utils import DownloadError, PostProcessingError, make_archive_id
+
+# Standard-Download-Ordner des Benutzers
+DEFAULT_DOWNLOADS_PATH = os.path.join(os.path.expanduser("~"), "Downloads")
+
+# Anzahl paralleler Downloads insgesamt bzw. pro Host
+DEFAULT_WORKERS = 4
+DEFAULT_PER_HOST = 2
+
+# Abstand (Sekunden) zwischen zwei Fortschrittsmeldungen
+REPORT_INTERVAL = 2.0
+
+# Blockgröße für Range-Requests (0 = ganze Datei in einem Request)
+DEFAULT_CHUNK_SIZE = 10 * 1024 * 1024
+
+# Dateiname des Download-Archivs im Zielordner
+ARCHIVE_FILENAME = ".download_archive.json"
+
+# Anzahl paralleler ffmpeg-Prozesse
+DEFAULT_TRANSCODERS = os.cpu_count() or 2
+
+# Audio-Encoder für ffmpeg je Zielformat
+FFMPEG_CODECS = {
+    "mp3": "libmp3lame",
+    "m4a": "aac",
+    "aac": "aac",
+    "opus": "libopus",
+    "vorbis": "libvorbis",
+    "flac": "flac",
+    "wav": "pcm_s16le",
+}
+
+# Dateiendung je Zielformat (falls abweichend)
+FFMPEG_EXTENSIONS = {"vorbis": "ogg", "aac": "m4a"}
+
+# Formatprofile: yt-dlp-Format, Zielformat für ffmpeg (None = nie konvertieren), Bitrate
+PROFILES = {
+    "mp3-192": {"format": "bestaudio/best", "codec": "mp3", "quality": "192"},
+    "mp3-320": {"format": "bestaudio/best", "codec": "mp3", "quality": "320"},
+    # m4a direkt vom Anbieter, kein ffmpeg nötig
+    "m4a-native": {"format": "bestaudio[ext=m4a]", "codec": None, "quality": None},
+    # bevorzugt natives m4a, sonst Konvertierung
+    "m4a": {"format": "bestaudio[ext=m4a]/bestaudio/best", "codec": "m4a", "quality": "192"},
+    "opus": {"format": "bestaudio[ext=webm]/bestaudio/best", "codec": "opus", "quality": None},
+    "original": {"format": "bestaudio/best", "codec": None, "quality": None},
+}
+
+DEFAULT_PROFILE = "mp3-192"
+
+
+def read_urls(source):
+    """Liest (URL, Profil oder None) aus einer Datei oder von stdin ("-").
+
+    Leerzeilen und Kommentare werden übersprungen; "profil url" wählt ein Profil pro Zeile.
+    """
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    items = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        if len(parts) == 2 and parts[0] in PROFILES:
+            items.append((parts[1], parts[0]))
+        else:
+            items.append((line, None))
+    return items
+
+
+def host_key(url):
+    """Host, auf den das Limit angewendet wird (youtu.be und youtube.com zählen gemeinsam)."""
+    host = (urlparse(url).hostname or "").lower()
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    if host == "youtu.be":
+        host = "youtube.com"
+    return host
+
+
+def interleave_hosts(items):
+    """Ordnet (URL, Profil) reihum nach Host an, damit Worker selten auf ein Host-Limit warten."""
+    queues = defaultdict(deque)
+    for item in items:
+        queues[host_key(item[0])].append(item)
+    ordered = []
+    while queues:
+        for host in list(queues):
+            ordered.append(queues[host].popleft())
+            if not queues[host]:
+                del queues[host]
+    return ordered
+
+
+class BatchProgress:
+    """Gesamtfortschritt eines Batch-Laufs und Messwerte je Eintrag (thread-sicher)."""
+
+    def __init__(self, total):
+        self.lock = threading.Lock()
+        self.total = total
+        self.done = 0
+        self.failed = []
+        self.active = 0
+        self.bytes = 0
+        self.transcoded = 0
+        self.queued = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+        # Messwerte je Eintrag; Schlüssel mit "_" sind interne Zeitstempel
+        self.items = []
+
+    def add_item(self, url, profile):
+        """Legt die Messwerte eines Eintrags an und gibt dessen Nummer zurück."""
+        with self.lock:
+            self.items.append({
+                "url": url,
+                "profile": profile,
+                "status": "wartet",
+                "files": [],
+                "bytes": 0,
+                "queue_wait": 0.0,
+                "download_time": 0.0,
+                "transcode_wait": 0.0,
+                "transcode_time": 0.0,
+                "postprocess_time": 0.0,
+                "error": None,
+                "_submitted": time.monotonic(),
+                "_download_start": None,
+                "_pending": 0,
+                "_loaded": False,
+                "_counted": False,
+                "_pp_start": {},
+            })
+            return len(self.items) - 1
+
+    def item_started(self, item):
+        with self.lock:
+            entry = self.items[item]
+            entry["queue_wait"] = time.monotonic() - entry["_submitted"]
+            entry["status"] = "lädt"
+            self.active += 1
+
+    def item_finished(self, item, error=None):
+        with self.lock:
+            entry = self.items[item]
+            self.active -= 1
+            entry["_loaded"] = True
+            if error is not None:
+                entry["status"] = "Fehler"
+                entry["error"] = error
+            elif entry["_pending"]:
+                entry["status"] = "wartet auf ffmpeg"
+            else:
+                entry["status"] = "fertig" if entry["bytes"] else "vorhanden"
+            self._settle(entry)
+
+    def _settle(self, entry):
+        # Ein Eintrag zählt erst als fertig oder fehlerhaft, wenn Download und
+        # alle Konvertierungen durch sind, und nur einmal (Aufruf unter self.lock)
+        if entry["_counted"] or not entry["_loaded"] or entry["_pending"]:
+            return
+        entry["_counted"] = True
+        if entry["error"] is not None:
+            self.failed.append((entry["url"], entry["error"]))
+        else:
+            self.done += 1
+
+    def progress_hook(self, item):
+        """Erzeugt einen yt-dlp progress_hook, der Bytes und Downloadzeit des Eintrags misst."""
+        seen = {}
+
+        def hook(d):
+            if d.get("status") not in ("downloading", "finished"):
+                return
+            name = d.get("filename") or d.get("tmpfilename") or ""
+            # bereits vorhandene Datei: yt-dlp meldet nur "finished" ohne
+            # downloaded_bytes, es wurde nichts übertragen
+            existing = d["status"] == "finished" and name not in seen and "downloaded_bytes" not in d
+            current = d.get("downloaded_bytes") or d.get("total_bytes") or 0
+            delta = current - seen.get(name, 0)
+            seen[name] = current
+            now = time.monotonic()
+            with self.lock:
+                entry = self.items[item]
+                if entry["_download_start"] is None:
+                    entry["_download_start"] = now
+                if delta > 0 and not existing:
+                    self.bytes += delta
+                    entry["bytes"] += delta
+                if d["status"] == "finished":
+                    entry["download_time"] = now - entry["_download_start"]
+                    entry["files"].append(os.path.basename(name))
+
+        return hook
+
+    def postprocessor_hook(self, item):
+        """Erzeugt einen yt-dlp postprocessor_hook, der die Zeit der Postprozessoren aufsummiert."""
+
+        def hook(d):
+            now = time.monotonic()
+            with self.lock:
+                entry = self.items[item]
+                if d.get("status") == "started":
+                    entry["_pp_start"][d.get("postprocessor")] = now
+                elif d.get("status") == "finished":
+                    start = entry["_pp_start"].pop(d.get("postprocessor"), None)
+                    if start is not None:
+                        entry["postprocess_time"] += now - start
+
+        return hook
+
+    def transcode_enqueued(self, item):
+        with self.lock:
+            self.queued += 1
+            self.items[item]["_pending"] += 1
+        return time.monotonic()
+
+    def transcode_started(self, item, enqueued):
+        with self.lock:
+            self.queued -= 1
+            entry = self.items[item]
+            entry["transcode_wait"] += time.monotonic() - enqueued
+            entry["status"] = "konvertiert"
+        return time.monotonic()
+
+    def transcode_finished(self, item, started, error=None):
+        with self.lock:
+            entry = self.items[item]
+            entry["transcode_time"] += time.monotonic() - started
+            entry["_pending"] -= 1
+            if error is not None:
+                entry["status"] = "Fehler"
+                entry["error"] = error
+            else:
+                self.transcoded += 1
+                if not entry["_pending"] and entry["_loaded"] and entry["status"] != "Fehler":
+                    entry["status"] = "fertig"
+            self._settle(entry)
+
+    def table(self, max_rows=15):
+        """Konsolentabelle der laufenden Einträge plus Gesamtzeile."""
+        with self.lock:
+            rows = [e for e in self.items if e["status"] in ("lädt", "wartet auf ffmpeg", "konvertiert")]
+            lines = [f"{'Eintrag':<40} {'Status':<18} {'MB':>7} {'MB/s':>6} {'Warten':>7} {'Download':>8} {'ffmpeg':>7}"]
+            for e in rows[:max_rows]:
+                name = (e["files"][-1] if e["files"] else e["url"])[-40:]
+                rate = e["bytes"] / 1e6 / e["download_time"] if e["download_time"] else 0.0
+                lines.append(
+                    f"{name:<40} {e['status']:<18} {e['bytes'] / 1e6:>7.1f} {rate:>6.2f} "
+                    f"{e['queue_wait']:>6.1f}s {e['download_time']:>7.1f}s {e['transcode_time']:>6.1f}s"
+                )
+            if len(rows) > max_rows:
+                lines.append(f"… {len(rows) - max_rows} weitere aktiv")
+        lines.append(self.line())
+        return "\n".join(lines)
+
+    def summary(self):
+        """Messwerte aller Einträge und Summen als JSON-fähiges Dict."""
+        with self.lock:
+            items = []
+            for e in self.items:
+                entry = {k: v for k, v in e.items() if not k.startswith("_")}
+                entry["throughput_mb_s"] = e["bytes"] / 1e6 / e["download_time"] if e["download_time"] else None
+                items.append(entry)
+            elapsed = time.monotonic() - self.started
+            totals = {
+                "items": len(items),
+                "failed": sum(1 for e in items if e["status"] == "Fehler"),
+                "bytes": self.bytes,
+                "wall_time": elapsed,
+                "throughput_mb_s": self.bytes / 1e6 / elapsed if elapsed else None,
+            }
+            for key in ("queue_wait", "download_time", "transcode_wait", "transcode_time", "postprocess_time"):
+                totals[key] = sum(e[key] for e in items)
+        return {"totals": totals, "items": items}
+
+    def line(self):
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            return (
+                f"[{self.done + len(self.failed)}/{self.total}] "
+                f"{self.done} fertig, {len(self.failed)} Fehler, {self.active} aktiv, "
+                f"{self.transcoded} konvertiert, {self.queued} in Warteschlange, {self.skipped} übersprungen, "
+                f"{self.bytes / 1e6:.1f} MB, {self.bytes / 1e6 / elapsed:.2f} MB/s"
+            )
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadArchive:
+    """Persistentes Archiv fertiger Downloads: "<extractor> <id> <format>" -> Datei, Größe, Hash."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Download-Archiv {path} nicht lesbar, starte leer: {e}")
+            self.entries = {}
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, separators=(",", ":"))
+            # erst auf die Platte, dann umbenennen: nach einem Absturz bleibt das alte Archiv gültig
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def contains(self, key):
+        """True, wenn die archivierte Datei noch existiert und unverändert ist.
+
+        Größe wird immer geprüft; der Hash nur neu berechnet, wenn sich die
+        Änderungszeit seit dem Eintrag geändert hat.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return False
+        path = os.path.join(os.path.dirname(self.path), entry["file"])
+        try:
+            info = os.stat(path)
+        except OSError:
+            return False
+        if info.st_size != entry["size"]:
+            return False
+        if info.st_mtime_ns != entry["mtime_ns"]:
+            if file_hash(path) != entry["hash"]:
+                return False
+            with self.lock:
+                entry["mtime_ns"] = info.st_mtime_ns
+                self._save()
+        return True
+
+    def record(self, key, path):
+        info = os.stat(path)
+        entry = {
+            "file": os.path.relpath(path, os.path.dirname(self.path)),
+            "size": info.st_size,
+            "mtime_ns": info.st_mtime_ns,
+            "hash": file_hash(path),
+        }
+        with self.lock:
+            self.entries[key] = entry
+            self._save()
+
+    def view(self, format_key, on_hit=None):
+        return ArchiveView(self, format_key, on_hit)
+
+
+class ArchiveView:
+    """Sicht auf das Archiv für ein Format; wird yt-dlp als 'download_archive' übergeben.
+
+    yt-dlp fragt damit vor dem Abruf (auch je Playlist-Eintrag) "extractor id" ab.
+    """
+
+    def __init__(self, archive, format_key, on_hit=None):
+        self.archive = archive
+        self.format_key = format_key
+        self.on_hit = on_hit
+
+    def __contains__(self, archive_id):
+        hit = self.archive.contains(f"{archive_id} {self.format_key}")
+        if hit and self.on_hit is not None:
+            self.on_hit()
+        return hit
+
+    def __bool__(self):
+        return True
+
+    def add(self, archive_id):
+        # Eintrag erfolgt erst mit der fertigen Datei (nach dem Verschieben bzw. Konvertieren)
+        pass
+
+
+def check_complete(d):
+    """progress_hook: bricht ab, wenn ein Download weniger (oder mehr) Bytes geliefert hat als angekündigt.
+
+    Läuft beim "finished"-Ereignis, also vor allen Postprozessoren; deren
+    Fixups und Merges dürfen die Dateigröße danach ändern.
+    """
+    if d.get("status") != "finished":
+        return
+    # total_bytes ist hier bereits downloaded_bytes; maßgeblich ist die vom
+    # Extraktor gemeldete Größe des Formats
+    received = d.get("downloaded_bytes")
+    expected = (d.get("info_dict") or {}).get("filesize")
+    if received is None or not expected or received == expected:
+        return
+    path = d.get("filename")
+    # unvollständige Rohdatei entfernen, damit der nächste Lauf sie neu holt
+    if path and os.path.exists(path):
+        os.remove(path)
+    raise DownloadError(f"{path}: {received} statt {expected} Bytes")
+
+
+class FinishedFile(PostProcessor):
+    """Meldet die fertige Datei an callback(pfad, archiv_id)."""
+
+    def __init__(self, callback=None):
+        super().__init__()
+        self.callback = callback
+
+    def run(self, info):
+        path = info["filepath"]
+        if self.callback is not None:
+            self.callback(path, make_archive_id(info["extractor_key"], info["id"]))
+        return [], info
+
+
+def target_path(path, profile):
+    """Pfad der Datei im Zielformat des Profils (gleich path, wenn nicht konvertiert werden muss)."""
+    codec = profile["codec"]
+    if codec is None:
+        return path
+    return os.path.splitext(path)[0] + "." + FFMPEG_EXTENSIONS.get(codec, codec)
+
+
+def transcode_file(path, profile, ffmpeg="ffmpeg"):
+    """Konvertiert path mit ffmpeg ins Zielformat und löscht die Quelldatei; gibt den neuen Pfad zurück."""
+    dest = target_path(path, profile)
+    if dest == path:
+        return path
+    codec = profile["codec"]
+    ext = os.path.splitext(dest)[1][1:]
+    tmp = os.path.splitext(path)[0] + ".temp." + ext
+    cmd = [ffmpeg, "-nostdin", "-y", "-loglevel", "error", "-i", path, "-vn",
+           "-codec:a", FFMPEG_CODECS.get(codec, codec)]
+    if profile.get("quality"):
+        cmd += ["-b:a", f"{profile['quality']}k"]
+    cmd.append(tmp)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise RuntimeError(result.stderr.strip() or f"ffmpeg Rückgabewert {result.returncode}")
+    os.replace(tmp, dest)
+    os.remove(path)
+    return dest
+
+
+def transcode_worker(jobs, progress, ffmpeg):
+    """Liest (Pfad, Profil, fertig-Callback, Eintrag, Einreihzeit) aus der Warteschlange, bis None kommt."""
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        path, profile, done, item, enqueued = job
+        started = progress.transcode_started(item, enqueued)
+        try:
+            done(transcode_file(path, profile, ffmpeg))
+        except Exception as e:
+            progress.transcode_finished(item, started, f"{os.path.basename(path)}: {e}")
+        else:
+            progress.transcode_finished(item, started)
+
+
+def download_one(url, item, ydl_opts, progress, host_slot, finished=None):
+    """Lädt eine URL mit eigener YoutubeDL-Instanz (die Instanzen sind nicht thread-sicher).
+
+    item: Nummer des Eintrags in progress.items (Messwerte).
+    finished(pfad, archiv_id, item): wird für jede fertige Datei aufgerufen.
+    """
+    opts = dict(ydl_opts)
+    opts["progress_hooks"] = list(opts.get("progress_hooks", [])) + [check_complete, progress.progress_hook(item)]
+    opts["postprocessor_hooks"] = list(opts.get("postprocessor_hooks", [])) + [progress.postprocessor_hook(item)]
+    opts.setdefault("quiet", True)
+    opts.setdefault("noprogress", True)
+    callback = None
+    if finished is not None:
+        def callback(path, archive_id):
+            finished(path, archive_id, item)
+    with host_slot(host_key(url)):
+        progress.item_started(item)
+        try:
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                ydl.add_post_processor(FinishedFile(callback), when="after_move")
+                ydl.download([url])
+        except Exception as e:
+            progress.item_finished(item, str(e))
+            return False
+    progress.item_finished(item)
+    return True
+
+
+def profile_options(name, output):
+    """yt-dlp-Optionen für ein Profil (ohne Konvertierung, die übernimmt die Transcode-Stufe)."""
+    return {
+        "format": PROFILES[name]["format"],
+        "outtmpl": "%(title)s.%(ext)s",
+        "paths": {"home": output},
+    }
+
+
+def run_batch(items, output=DEFAULT_DOWNLOADS_PATH, default_profile=DEFAULT_PROFILE,
+              workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+              transcoders=DEFAULT_TRANSCODERS, queue_size=None, archive=None,
+              chunk_size=DEFAULT_CHUNK_SIZE, report_interval=REPORT_INTERVAL, live_table=True):
+    """Lädt alle (URL, Profil)-Einträge parallel und gibt das BatchProgress-Objekt zurück.
+
+    Einträge ohne Profil nutzen default_profile. Alle Profile teilen sich
+    Download-Pool, Transcode-Pool und Archiv.
+    queue_size: Plätze in der Transcode-Warteschlange (Standard: 2 * transcoders).
+    archive: DownloadArchive; bereits vorhandene Dateien werden übersprungen.
+    chunk_size: Bytes pro Range-Request; .part-Dateien werden fortgesetzt.
+    live_table: Tabelle der aktiven Einträge statt einer Fortschrittszeile ausgeben.
+    """
+    items = interleave_hosts([(url, name or default_profile) for url, name in items])
+    progress = BatchProgress(len(items))
+    ffmpeg = shutil.which("ffmpeg")
+    jobs = queue.Queue(maxsize=queue_size or 2 * max(1, transcoders))
+    converters = []
+    if ffmpeg is not None and any(PROFILES[name]["codec"] for _url, name in items):
+        converters = [
+            threading.Thread(target=transcode_worker, args=(jobs, progress, ffmpeg), daemon=True)
+            for _ in range(max(1, transcoders))
+        ]
+        for t in converters:
+            t.start()
+
+    def skipped():
+        with progress.lock:
+            progress.skipped += 1
+
+    def finished_callback(name):
+        profile = PROFILES[name]
+
+        def done(path, archive_id):
+            if archive is not None:
+                archive.record(f"{archive_id} {name}", path)
+
+        def finished(path, archive_id, item):
+            if target_path(path, profile) == path:
+                # Anbieter liefert bereits das Zielformat -> ohne ffmpeg übernehmen
+                done(path, archive_id)
+                return
+            if not converters:
+                raise PostProcessingError("ffmpeg wurde nicht gefunden (wird für die Konvertierung benötigt).")
+            enqueued = progress.transcode_enqueued(item)
+            # blockiert, solange die Warteschlange voll ist (Backpressure)
+            jobs.put((path, profile, lambda dest: done(dest, archive_id), item, enqueued))
+
+        return finished
+
+    options = {}
+    for name in {name for _url, name in items}:
+        opts = profile_options(name, output)
+        opts["continuedl"] = True
+        opts["nopart"] = False
+        if chunk_size:
+            opts["http_chunk_size"] = chunk_size
+        if archive is not None:
+            opts["download_archive"] = archive.view(name, on_hit=skipped)
+        options[name] = (opts, finished_callback(name))
+
+    slots_lock = threading.Lock()
+    slots = {}
+
+    def host_slot(host):
+        # Semaphore pro Host, beim ersten Zugriff angelegt
+        with slots_lock:
+            if host not in slots:
+                slots[host] = threading.BoundedSemaphore(per_host)
+            return slots[host]
+
+    stop = threading.Event()
+
+    def report():
+        redraw = live_table and sys.stdout.isatty()
+        height = 0
+        while not stop.wait(report_interval):
+            text = progress.table() if live_table else progress.line()
+            if redraw and height:
+                # vorherige Tabelle im Terminal überschreiben
+                sys.stdout.write(f"\033[{height}F\033[J")
+            print(text, flush=True)
+            height = text.count("\n") + 1
+
+    reporter = threading.Thread(target=report, daemon=True)
+    reporter.start()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for url, name in items:
+                opts, finished = options[name]
+                item = progress.add_item(url, name)
+                pool.submit(download_one, url, item, opts, progress, host_slot, finished)
+        # Downloads fertig -> Transcoder nach Abarbeiten der Warteschlange beenden
+        for _ in converters:
+            jobs.put(None)
+        for t in converters:
+            t.join()
+    finally:
+        stop.set()
+        reporter.join()
+    print(progress.line(), flush=True)
+    for url, error in progress.failed:
+        print(f"❌ {url}: {error}")
+    return progress
+
+
+def main(default_profile=DEFAULT_PROFILE, default_url=None, description="YouTube-Audio herunterladen"):
+    """Kommandozeile des Downloaders; ohne URLs wird default_url geladen (falls gesetzt)."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("urls", nargs="*", help="URLs (optional)")
+    parser.add_argument("-p", "--profile", choices=sorted(PROFILES), default=default_profile,
+                        help=f"Formatprofil (Standard: {default_profile})")
+    parser.add_argument("-i", "--input", help="Datei mit einer URL pro Zeile, '-' für stdin")
+    parser.add_argument("-o", "--output", default=DEFAULT_DOWNLOADS_PATH, help="Zielordner")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="parallele Downloads insgesamt")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="parallele Downloads pro Host")
+    parser.add_argument("-t", "--transcoders", type=int, default=DEFAULT_TRANSCODERS, help="parallele ffmpeg-Prozesse")
+    parser.add_argument("--queue-size", type=int, help="Plätze in der Transcode-Warteschlange")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Bytes pro Range-Request (0 = ohne Blöcke)")
+    parser.add_argument("--archive", help=f"Download-Archiv (Standard: {ARCHIVE_FILENAME} im Zielordner)")
+    parser.add_argument("--no-archive", action="store_true", help="Archiv nicht verwenden")
+    parser.add_argument("--metrics", help="JSON-Zusammenfassung der Messwerte in diese Datei schreiben ('-' = stdout)")
+    args = parser.parse_args()
+
+    items = [(url, None) for url in args.urls]
+    if args.input:
+        items.extend(read_urls(args.input))
+    if not items and default_url:
+        items = [(default_url, None)]
+    if not items:
+        parser.error("keine URL angegeben")
+
+    archive = None
+    if not args.no_archive:
+        os.makedirs(args.output, exist_ok=True)
+        archive = DownloadArchive(args.archive or os.path.join(args.output, ARCHIVE_FILENAME))
+    progress = run_batch(items, output=args.output, default_profile=args.profile,
+                         workers=args.workers, per_host=args.per_host,
+                         transcoders=args.transcoders, queue_size=args.queue_size, archive=archive,
+                         chunk_size=args.chunk_size)
+    if args.metrics:
+        summary = json.dumps(progress.summary(), ensure_ascii=False, indent=2)
+        if args.metrics == "-":
+            print(summary)
+        else:
+            with open(args.metrics, 'w', encoding='utf-8') as f:
+                f.write(summary)
+    if progress.failed:
+        sys.exit(1)
+    print(f"Download abgeschlossen! Dateien liegen in {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,8 @@
-import os
-import yt_dlp
+import Youtube_download
 
-# YouTube-Link hier einfügen
+# YouTube-Link hier einfügen (wird geladen, wenn keine URLs übergeben werden)
 url = "https://youtu.be/EZVFdxvFou4"
 
-# Standard-Download-Ordner des Benutzers ermitteln
-downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
-
-# Optionen für yt-dlp
-ydl_opts = {
-    'format': 'bestaudio/best',   # beste Audioqualität
-    'outtmpl': os.path.join(downloads_path, '%(title)s.%(ext)s'),
-    'postprocessors': [{
-        'key': 'FFmpegExtractAudio',
-        'preferredcodec': 'mp3',   # gewünschtes Format
-        'preferredquality': '192', # Qualität in kbit/s
-    }],
-}
-
-# Download starten
-with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-    ydl.download([url])
-
-print("Download abgeschlossen! MP3 liegt im Downloads-Ordner.")
+# Download als MP3 mit 192 kbit/s (weitere Profile: python Youtube_download.py --help)
+if __name__ == "__main__":
+    Youtube_download.main("mp3-192", url, "YouTube-Audio als MP3 herunterladen")
@@ -1,20 +1,8 @@
-import os
-import yt_dlp
+import Youtube_download
 
-# YouTube-Link hier einfügen
+# YouTube-Link hier einfügen (wird geladen, wenn keine URLs übergeben werden)
 url = "https://youtu.be/toRmf2tbcrU?list=RDM8Wj6-gPY0g"
 
-# Standard-Download-Ordner des Benutzers ermitteln
-downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
-
-# Optionen für yt-dlp
-ydl_opts = {
-    'format': 'bestaudio[ext=m4a]',   # beste Audioqualität im M4A-Format
-    'outtmpl': os.path.join(downloads_path, '%(title)s.%(ext)s')  # Dateiname = Videotitel
-}
-
-# Download starten
-with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-    ydl.download([url])
-
-print("Download abgeschlossen! Datei liegt im Downloads-Ordner.")
+# Download im M4A-Format direkt vom Anbieter, ohne Konvertierung
+if __name__ == "__main__":
+    Youtube_download.main("m4a-native", url, "YouTube-Audio als M4A herunterladen")